@@ -0,0 +1,214 @@
+import cv2
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import movement_detector
+import video_reader
+
+# Methods that carry state between consecutive pairs cannot compare arbitrary frame pairs
+_STATEFUL_METHODS = ('keyframe', 'tracked_flow')
+
+
+class _FrameReader:
+    """Random access to decoded frames of a seekable video with a small cache"""
+
+    def __init__(self, video_path: str, color: str, max_width: Optional[int], seek_threshold: int = 100,
+                 cache_size: int = 64):
+        self.cap = cv2.VideoCapture(video_path)
+        self.color = color
+        self.max_width = max_width
+        self.seek_threshold = seek_threshold
+        self.cache_size = cache_size
+        self.position = 0  # number of the frame the next read returns
+        self.frames_decoded = 0
+        self._cache = OrderedDict()
+
+    def get(self, frame_number: int) -> Optional[np.ndarray]:
+        """Decoded frame by number, or None past the end of the video"""
+        frame = self._cache.get(frame_number)
+        if frame is not None:
+            self._cache.move_to_end(frame_number)
+            return frame
+
+        # Short forward gaps are grabbed without decoding, anything else seeks
+        gap = frame_number - self.position
+        if 0 <= gap <= self.seek_threshold:
+            for _ in range(gap):
+                if not self.cap.grab():
+                    return None
+        else:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+
+        ret, frame = self.cap.read()
+        if not ret:
+            self.position = frame_number
+            return None
+        self.position = frame_number + 1
+        self.frames_decoded += 1
+
+        frame = video_reader.convert_frame(frame, self.color, self.max_width)
+        self._cache[frame_number] = frame
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return frame
+
+    def prefetch(self, start: int, stop: int):
+        """Decode frames start..stop in order so later random access within them hits the cache"""
+        for frame_number in range(start, stop + 1):
+            if frame_number not in self._cache and self.get(frame_number) is None:
+                return
+
+    def release(self):
+        self.cap.release()
+        self._cache.clear()
+
+
+def detect_movement_adaptive(video_path: str, threshold: float = 50.0, method: str = 'frame_difference',
+                             coarse_step: int = 30, min_confidence: float = 0.25, settle_frames: int = 5,
+                             warm_after_event: int = 2, max_width: Optional[int] = None,
+                             detector: Optional[movement_detector.CameraMovementDetector] = None) -> Dict:
+    """
+    Detect camera movement in a video by sampling sparsely on static stretches.
+
+    Frames coarse_step apart are compared while the camera is static. When a
+    coarse pair moves, the detector cannot estimate it (e.g. optical flow over
+    a displacement beyond its capture range) or its frame difference
+    confidence reaches min_confidence, the interval is bisected for the first
+    frame that differs from its start (the onset), and consecutive pairs are
+    then analyzed at the full frame rate until settle_frames static pairs in a
+    row mark the offset. Coarse sampling resumes from there.
+
+    Args:
+        video_path: Path of a seekable video file.
+        threshold: Sensitivity threshold for detecting movement.
+        method: Detection method; 'keyframe' and 'tracked_flow' are not supported
+            because they depend on consecutive pairs.
+        coarse_step: Frame distance compared on static stretches.
+        min_confidence: Frame difference confidence that triggers refinement without a detection.
+        settle_frames: Static full-rate pairs that end a movement event.
+        warm_after_event: Coarse intervals after an event that are decoded in full,
+            which avoids slow backward seeks when movement resumes shortly after.
+        max_width: Downscale frames wider than this while decoding.
+        detector: Detector instance to reuse; a new one is created when omitted.
+
+    Returns:
+        Dict with 'segments' (MovementSegment with original frame numbers),
+        'movement_frames' (every frame whose pair with its predecessor moved)
+        and 'stats' on how much of the video was decoded and analyzed.
+    """
+    if method in _STATEFUL_METHODS:
+        raise ValueError(f"Method '{method}' depends on consecutive pairs and cannot be sampled adaptively")
+
+    coarse_step = max(1, coarse_step)
+    settle_frames = max(1, settle_frames)
+    detector = detector or movement_detector.CameraMovementDetector(cache_size=4)
+    # Coarse sampling resumes inside the last refined interval, so the cache
+    # holds two coarse intervals plus the frames around an offset
+    reader = _FrameReader(video_path, 'gray', max_width, cache_size=2 * coarse_step + 2 * settle_frames + 2)
+    pairs_analyzed = 0
+
+    def compare(frame_number1: int, frame_number2: int) -> Optional[Tuple[bool, bool, List[Dict]]]:
+        """Movement decision, refinement trigger and results of a frame pair (None past the end)"""
+        nonlocal pairs_analyzed
+        frame1, frame2 = reader.get(frame_number1), reader.get(frame_number2)
+        if frame1 is None or frame2 is None:
+            return None
+        pairs_analyzed += 1
+        movement_detected, results = movement_detector.detect_pair(detector, frame1, frame2, threshold, method)
+        # Detectors return no details when they could not estimate the motion
+        # at all, e.g. flow that lost every point over a coarse step; that is
+        # not evidence of a static camera
+        suspicious = movement_detected or any('details' not in r for r in results)
+        if not suspicious:
+            # Flow confidences measure consistency rather than displacement, so
+            # refinement is gated by the cheap frame difference score instead
+            gate = next((r for r in results if r['method'] == 'frame_difference'), None)
+            if gate is None:
+                gate = detector.detect_frame_difference(frame1, frame2, threshold)
+            suspicious = gate['movement_detected'] or gate['confidence'] >= min_confidence
+        return movement_detected, suspicious, results
+
+    def find_onset(start: int, stop: int) -> int:
+        """First frame in (start, stop] that differs from frame start, by bisection"""
+        # Backward seeks decode from the previous keyframe, so the interval is
+        # decoded once in order and bisection only costs detector calls
+        reader.prefetch(start + 1, stop)
+        low, high = start, stop
+        while high - low > 1:
+            middle = (low + high) // 2
+            comparison = compare(start, middle)
+            if comparison is not None and comparison[1]:
+                high = middle
+            else:
+                low = middle
+        return high
+
+    segments = []
+    movement_frames = []
+    try:
+        position = 0
+        # Movement clusters in time, so the intervals right after an event are
+        # decoded in full up front instead of seeking back into them later
+        warm_intervals = 0
+        while True:
+            if warm_intervals > 0:
+                reader.prefetch(position + 1, position + coarse_step)
+                warm_intervals -= 1
+            comparison = compare(position, position + coarse_step)
+            if comparison is None:
+                # Near the end of the video: fall back to full rate for the remainder
+                if coarse_step > 1 and reader.get(position + 1) is not None:
+                    comparison = compare(position, position + 1)
+                    next_position = position + 1
+                else:
+                    break
+            else:
+                next_position = position + coarse_step
+
+            if not comparison[1]:
+                position = next_position
+                continue
+
+            # Full frame rate from the onset until the camera settles
+            frame_number = find_onset(position, next_position)
+            event_frames, event_results = [], []
+            peak_confidence, static_run = 0.0, 0
+            while static_run < settle_frames:
+                comparison = compare(frame_number - 1, frame_number)
+                if comparison is None:
+                    break
+                movement_detected, _, results = comparison
+                if movement_detected:
+                    event_frames.append(frame_number)
+                    event_results.append(results)
+                    peak_confidence = max(peak_confidence, max(float(r['confidence']) for r in results))
+                    static_run = 0
+                else:
+                    static_run += 1
+                frame_number += 1
+
+            if event_frames:
+                movement_frames.extend(event_frames)
+                segments.append(movement_detector.MovementSegment(
+                    event_frames[0], event_frames[-1], peak_confidence,
+                    movement_detector.motion_type(event_results)
+                ))
+            # Resume coarse sampling from the last frame analyzed at full rate
+            position = frame_number - 1
+            warm_intervals = warm_after_event
+    finally:
+        frames_decoded = reader.frames_decoded
+        reader.release()
+
+    total_frames = video_reader.get_video_info(video_path)['frame_count']
+    return {
+        'segments': segments,
+        'movement_frames': movement_frames,
+        'stats': {
+            'total_frames': total_frames,
+            'frames_decoded': frames_decoded,
+            'pairs_analyzed': pairs_analyzed,
+            'decoded_fraction': frames_decoded / max(total_frames, 1)
+        }
+    }
@@ -1,42 +1,57 @@
 import streamlit as st
-import numpy as np
-from PIL import Image
-import cv2
+import hashlib
 import tempfile
+import threading
 import os
 import movement_detector
+import video_reader
+from frame_store import FrameStore
+
+# Methods whose decisions depend on the threshold only through frame difference
+# scores, so cached results can be re-thresholded without re-running detectors
+RETHRESHOLDABLE_METHODS = [m for m in movement_detector.DETECTION_METHODS if m != 'cascade']
 
 def extract_frames_from_video(video_path, max_frames=100):
-    """Extract frames from video file"""
-    cap = cv2.VideoCapture(video_path)
-    frames = []
-    frame_count = 0
-    
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    
-    st.info(f"Video info: {total_frames} total frames, {fps} FPS")
-    
-    # Sample frames if video is too long
-    frame_step = max(1, total_frames // max_frames)
-    
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-            
-        if frame_count % frame_step == 0:
-            # Convert BGR to RGB
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            frames.append(frame_rgb)
-            
-        frame_count += 1
-        
-        if len(frames) >= max_frames:
-            break
+    """Extract frames from video file into one contiguous frame store"""
+    # Sample frames if video is too long; skipped frames are never retrieved and
+    # long files are decoded by several processes
+    return FrameStore.from_video(video_path, max_frames=max_frames, workers=None)
+
+# Cached resources are returned as the same objects on every rerun, which keeps
+# the frame identities stable for the detector's per-frame feature cache
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_video_frames(upload_hash, suffix, max_frames, _video_bytes):
+    """Decode an uploaded video once per content hash and decode parameters"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp_file:
+        tmp_file.write(_video_bytes)
+        temp_video_path = tmp_file.name
     
-    cap.release()
-    return frames
+    try:
+        info = video_reader.get_video_info(temp_video_path)
+        return extract_frames_from_video(temp_video_path, max_frames), info
+    finally:
+        # Clean up temporary file
+        if os.path.exists(temp_video_path):
+            os.unlink(temp_video_path)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def load_image_frames(upload_hash, _uploaded_files):
+    """Decode an uploaded image sequence once per content hash"""
+    # Images are decoded straight into the store; RGBA drops alpha without an extra copy
+    return FrameStore.from_images(_uploaded_files)
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def get_frame_detector(frames_key, n_frames):
+    """Detector caching the features of every frame of one upload, with a lock for concurrent sessions"""
+    return movement_detector.CameraMovementDetector(cache_size=max(2, n_frames)), threading.Lock()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def analyze_frames(frames_key, method, threshold, _frames):
+    """Per-pair raw detection results, cached per upload, method and (for cascade) threshold"""
+    detector, lock = get_frame_detector(frames_key, len(_frames))
+    with lock:
+        detector.reset_state()
+        return movement_detector.analyze_movement(_frames, threshold=threshold, method=method, detector=detector)
 
 st.title("🎥 Camera Movement Detection")
 st.write(
@@ -47,6 +62,7 @@ st.write(
 tab1, tab2 = st.tabs(["📁 Video File", "🖼️ Image Sequence"])
 
 frames = []
+frames_key = None
 input_method = None
 
 with tab1:
@@ -58,26 +74,25 @@ with tab1:
     )
     
     if uploaded_video is not None:
-        # Save uploaded video to temporary file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_video.name.split('.')[-1]}") as tmp_file:
-            tmp_file.write(uploaded_video.read())
-            temp_video_path = tmp_file.name
+        video_bytes = uploaded_video.getvalue()
+        upload_hash = hashlib.sha256(video_bytes).hexdigest()
+        max_frames = 100
         
         try:
             st.success(f"Video uploaded: {uploaded_video.name}")
             
-            # Extract frames
+            # Extract frames (cached by content hash and decode parameters)
             with st.spinner("Extracting frames from video..."):
-                frames = extract_frames_from_video(temp_video_path)
+                frames, info = load_video_frames(
+                    upload_hash, f".{uploaded_video.name.split('.')[-1]}", max_frames, video_bytes
+                )
             
+            st.info(f"Video info: {info['frame_count']} total frames, {int(info['fps'])} FPS")
+            frames_key = f"video:{upload_hash}:{max_frames}"
             input_method = "video"
             
         except Exception as e:
             st.error(f"Error processing video: {str(e)}")
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_video_path):
-                os.unlink(temp_video_path)
 
 with tab2:
     st.subheader("Upload Image Sequence")
@@ -89,16 +104,18 @@ with tab2:
     )
 
     if uploaded_files:
-        frames = []
+        sequence_hash = hashlib.sha256()
         for uploaded_file in uploaded_files:
-            image = Image.open(uploaded_file)
-            frame = np.array(image)
-            if frame.shape[-1] == 4:  # RGBA to RGB
-                frame = frame[:, :, :3]
-            frames.append(frame)
+            sequence_hash.update(uploaded_file.getvalue())
+        upload_hash = sequence_hash.hexdigest()
         
-        input_method = "images"
-        st.success(f"Loaded {len(frames)} images")
+        try:
+            frames = load_image_frames(upload_hash, uploaded_files)
+            frames_key = f"images:{upload_hash}"
+            input_method = "images"
+            st.success(f"Loaded {len(frames)} images")
+        except Exception as e:
+            st.error(f"Error loading images: {str(e)}")
 
 # Process frames if any input is provided
 if frames:
@@ -107,18 +124,25 @@ if frames:
     # Algorithm selection
     algorithm_method = st.selectbox(
         "🔬 Detection Algorithm",
-        ["auto", "feature_matching", "optical_flow", "frame_difference"],
+        ["auto", "cascade", "feature_matching", "keyframe", "optical_flow", "tracked_flow", "grid_flow",
+         "phase_correlation",
+         "frame_difference"],
         index=0,
         help="""
         • auto: Combines multiple methods for best accuracy
+        • cascade: Frame difference first, advanced methods only on uncertain frames (fast)
         • feature_matching: ORB keypoints + RANSAC homography (advanced)
+        • keyframe: Feature matching against a reference frame, catches slow drift
         • optical_flow: Lucas-Kanade optical flow tracking
+        • tracked_flow: Optical flow with points tracked across frames (fast)
+        • grid_flow: Optical flow on a fixed point grid with a robust affine fit (fast, handles flat scenes)
+        • phase_correlation: Global shift from FFT phase correlation (fast)
         • frame_difference: Basic pixel difference (fast)
         """
     )
     
-    # Add threshold slider (only for frame_difference method)
-    if algorithm_method in ['auto', 'frame_difference']:
+    # Add threshold slider (only for methods using frame difference)
+    if algorithm_method in ['auto', 'cascade', 'frame_difference']:
         threshold = st.slider(
             "Movement Detection Threshold", 
             min_value=10.0, 
@@ -130,66 +154,44 @@ if frames:
     else:
         threshold = 50.0  # Default for other methods
     
-    # Detect movement
+    # Detect movement; changing only the threshold re-thresholds cached raw scores
     with st.spinner(f"Analyzing camera movement using {algorithm_method} method..."):
-        if algorithm_method == 'auto':
-            movement_indices = movement_detector.detect_significant_movement(
-                frames, threshold=threshold, method='auto'
-            )
+        if algorithm_method in RETHRESHOLDABLE_METHODS:
+            analysis = analyze_frames(frames_key, algorithm_method, 50.0, frames).rethreshold(threshold)
         else:
-            movement_indices = movement_detector.detect_significant_movement(
-                frames, threshold=threshold, method=algorithm_method
-            )
+            analysis = analyze_frames(frames_key, algorithm_method, threshold, frames)
+        movement_indices = analysis.indices
     
     # Display results
     if movement_indices:
-        st.success(f"🚨 Significant movement detected at {len(movement_indices)} frames: {movement_indices}")
+        st.success(
+            f"🚨 Significant movement detected at {len(movement_indices)} frames "
+            f"in {len(analysis.segments)} segments: {movement_indices}"
+        )
+        for segment in analysis.segments:
+            st.write(
+                f"• Frames {segment.start}–{segment.end}: {segment.motion_type} "
+                f"(peak confidence {segment.peak_confidence:.2f})"
+            )
         
-        # Show detailed analysis for advanced methods
-        if algorithm_method in ['auto', 'feature_matching', 'optical_flow']:
-            with st.expander("🔍 Detailed Analysis"):
-                detector = movement_detector.CameraMovementDetector()
+        # Show the cached detector results of the first detected frames
+        with st.expander("🔍 Detailed Analysis"):
+            for idx in movement_indices[:3]:  # Show details for first 3 detected frames
+                st.subheader(f"Frame {idx} Analysis")
+                
+                pair_results = analysis.details[idx]
+                cols = st.columns(len(pair_results))
+                
+                for col, result in zip(cols, pair_results):
+                    with col:
+                        st.write(f"**{result['method'].replace('_', ' ').title()}:**")
+                        if result['movement_detected']:
+                            st.write(f"✅ Movement: {result['confidence']:.2f} confidence")
+                            st.json(result.get('details', {}))
+                        else:
+                            st.write("❌ No movement detected")
                 
-                for idx in movement_indices[:3]:  # Show details for first 3 detected frames
-                    if idx > 0:
-                        st.subheader(f"Frame {idx} Analysis")
-                        
-                        frame1 = frames[idx-1]
-                        frame2 = frames[idx]
-                        
-                        cols = st.columns(3)
-                        
-                        if algorithm_method in ['auto', 'feature_matching']:
-                            with cols[0]:
-                                st.write("**Feature Matching:**")
-                                result = detector.detect_with_feature_matching(frame1, frame2)
-                                if result['movement_detected']:
-                                    st.write(f"✅ Movement: {result['confidence']:.2f} confidence")
-                                    st.json(result['details'])
-                                else:
-                                    st.write("❌ No movement detected")
-                        
-                        if algorithm_method in ['auto', 'optical_flow']:
-                            with cols[1]:
-                                st.write("**Optical Flow:**")
-                                result = detector.detect_with_optical_flow(frame1, frame2)
-                                if result['movement_detected']:
-                                    st.write(f"✅ Movement: {result['confidence']:.2f} confidence")
-                                    st.json(result['details'])
-                                else:
-                                    st.write("❌ No movement detected")
-                        
-                        if algorithm_method in ['auto', 'frame_difference']:
-                            with cols[2]:
-                                st.write("**Frame Difference:**")
-                                result = detector.detect_frame_difference(frame1, frame2, threshold)
-                                if result['movement_detected']:
-                                    st.write(f"✅ Movement: {result['confidence']:.2f} confidence")
-                                    st.json(result['details'])
-                                else:
-                                    st.write("❌ No movement detected")
-                        
-                        st.divider()
+                st.divider()
         
         # Create columns for frame display
         cols_per_row = 3
@@ -198,7 +200,7 @@ if frames:
             for j, idx in enumerate(movement_indices[i:i+cols_per_row]):
                 with cols[j]:
                     st.image(
-                        frames[idx], 
+                        frames.thumbnail(idx), 
                         caption=f"Frame {idx} - Movement Detected", 
                         use_container_width=True
                     )
@@ -219,9 +221,9 @@ if frames:
         cols = st.columns(len(sample_indices))
         for i, idx in enumerate(sample_indices):
             with cols[i]:
-                movement_status = "🚨 Movement" if idx in movement_indices else "✅ Static"
+                movement_status = "🚨 Movement" if idx in analysis else "✅ Static"
                 st.image(
-                    frames[idx], 
+                    frames.thumbnail(idx), 
                     caption=f"Frame {idx}\n{movement_status}", 
                     use_container_width=True
                 )
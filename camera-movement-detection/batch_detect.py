@@ -0,0 +1,303 @@
+"""
+Headless batch processing of video files and directories.
+
+Every video is streamed through the detector (only the previous frame is
+kept in memory) and its per-pair results are written to one JSONL or Parquet
+file in the output directory. Files are processed concurrently by a process
+pool, finished files are recorded in a checkpoint so interrupted runs resume
+where they stopped, and throughput is printed per file and for the run.
+
+    python batch_detect.py /archive/2025-06-01 "/cams/*/night_*.mp4" --workers 8 --output-dir results
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
+
+import movement_detector
+import video_reader
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+OUTPUT_FORMATS = ['jsonl', 'parquet']
+
+
+def find_videos(inputs: List[str]) -> List[str]:
+    """Expand files, glob patterns and directories (searched recursively) into a sorted list of videos"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.update(os.path.join(root, name) for name in files if name.lower().endswith(VIDEO_EXTENSIONS))
+        elif os.path.isfile(item):
+            paths.add(item)
+        else:
+            paths.update(path for path in glob.glob(item, recursive=True)
+                         if os.path.isfile(path) and path.lower().endswith(VIDEO_EXTENSIONS))
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def _output_path(video_path: str, output_dir: str, output_format: str) -> str:
+    """Output file of a video; the path hash keeps equal names from different directories apart"""
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    digest = hashlib.sha1(video_path.encode()).hexdigest()[:8]
+    return os.path.join(output_dir, f"{stem}-{digest}.{output_format}")
+
+
+def _file_signature(video_path: str, settings: Dict) -> Dict:
+    """Identity of one unit of work: the file's size and mtime plus the detection settings"""
+    stat = os.stat(video_path)
+    return {'path': video_path, 'size': stat.st_size, 'mtime': stat.st_mtime, 'settings': settings}
+
+
+def _to_builtin(value):
+    """JSON fallback for numpy scalars and arrays inside detector details"""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _pair_record(pair: Dict, frame_number: int, fps: float, include_details: bool) -> Dict:
+    """Flat output record of one frame pair"""
+    record = {
+        'frame': frame_number,
+        'timestamp': frame_number / fps if fps > 0 else None,
+        'movement_detected': bool(pair['movement_detected']),
+        'confidence': max((float(r['confidence']) for r in pair['results'] if r['movement_detected']), default=0.0),
+        'methods': {r['method']: float(r['confidence']) if r['movement_detected'] else 0.0 for r in pair['results']}
+    }
+    if include_details:
+        record['details'] = json.dumps([r.get('details', {}) for r in pair['results']], default=_to_builtin)
+    return record
+
+
+def process_video(video_path: str, output_path: str, settings: Dict) -> Dict:
+    """
+    Stream one video through the detector and write its per-pair records.
+
+    Args:
+        video_path: Path of the video file.
+        output_path: File to write the records to ('.jsonl' or '.parquet').
+        settings: Detection settings (method, threshold, step, max_width,
+            processing_width, include_details).
+
+    Returns:
+        Summary dict with frame, pair and movement counts and the elapsed time.
+    """
+    start_time = time.perf_counter()
+    fps = video_reader.get_video_info(video_path)['fps']
+    detector = movement_detector.CameraMovementDetector(processing_width=settings['processing_width'])
+
+    # Detectors only need grayscale; the frame number of each position is kept for the records
+    frame_numbers = []
+
+    def frames() -> Iterator[np.ndarray]:
+        for frame_number, frame in video_reader.read_frames(
+            video_path, step=settings['step'], color='gray', max_width=settings['max_width']
+        ):
+            frame_numbers.append(frame_number)
+            yield frame
+
+    records = (
+        _pair_record(pair, frame_numbers[pair['index']], fps, settings['include_details'])
+        for pair in movement_detector.detect_movement_stream(
+            frames(), settings['threshold'], settings['method'], detector=detector
+        )
+    )
+
+    # Write to a temporary name so an interrupted file is never taken as finished
+    partial_path = output_path + '.part'
+    if output_path.endswith('.parquet'):
+        pairs, movement_pairs = _write_parquet(records, partial_path)
+    else:
+        pairs, movement_pairs = _write_jsonl(records, partial_path)
+    os.replace(partial_path, output_path)
+
+    return {
+        'output': output_path,
+        'fps': fps,
+        'frames': len(frame_numbers),
+        'video_seconds': (frame_numbers[-1] + 1) / fps if frame_numbers and fps > 0 else 0.0,
+        'pairs': pairs,
+        'movement_pairs': movement_pairs,
+        'seconds': time.perf_counter() - start_time
+    }
+
+
+def _write_jsonl(records: Iterator[Dict], path: str):
+    """Write records as they are produced; returns the pair and movement counts"""
+    pairs = movement_pairs = 0
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+            pairs += 1
+            movement_pairs += record['movement_detected']
+    return pairs, movement_pairs
+
+
+def _write_parquet(records: Iterator[Dict], path: str, row_group_size: int = 4096):
+    """Write records in row groups as they are produced; returns the pair and movement counts"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pairs = movement_pairs = 0
+    writer = None
+    rows = []
+    try:
+        for record in records:
+            # Per-method confidences vary by method, so they are stored as a JSON column
+            record['methods'] = json.dumps(record['methods'])
+            rows.append(record)
+            pairs += 1
+            movement_pairs += record['movement_detected']
+            if len(rows) < row_group_size:
+                continue
+            # The first row group fixes the schema of the file
+            table = pa.Table.from_pylist(rows, schema=writer.schema if writer is not None else None)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            rows = []
+
+        if writer is None:
+            pq.write_table(pa.Table.from_pylist(rows), path)
+        elif rows:
+            writer.write_table(pa.Table.from_pylist(rows, schema=writer.schema))
+    finally:
+        if writer is not None:
+            writer.close()
+    return pairs, movement_pairs
+
+
+def _process_in_worker(video_path: str, output_path: str, settings: Dict) -> Dict:
+    """process_video inside a pool worker"""
+    movement_detector.init_pool_worker()
+    return process_video(video_path, output_path, settings)
+
+
+def load_checkpoint(path: str) -> Dict[str, Dict]:
+    """Finished work units by video path; lines of an interrupted write are ignored"""
+    finished = {}
+    if not os.path.exists(path):
+        return finished
+    with open(path) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            finished[entry['signature']['path']] = entry
+    return finished
+
+
+def run_batch(videos: List[str], output_dir: str, settings: Dict, output_format: str = 'jsonl',
+              workers: int = 1, checkpoint_path: Optional[str] = None, resume: bool = True) -> List[Dict]:
+    """
+    Process videos concurrently, skipping files finished by an earlier run.
+
+    A file counts as finished when the checkpoint holds an entry with the same
+    size, mtime and settings and its output file still exists.
+
+    Returns:
+        Summaries of the files processed in this run.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    checkpoint_path = checkpoint_path or os.path.join(output_dir, 'checkpoint.jsonl')
+    finished = load_checkpoint(checkpoint_path) if resume else {}
+
+    pending = []
+    for video_path in videos:
+        signature = _file_signature(video_path, dict(settings, format=output_format))
+        entry = finished.get(video_path)
+        if entry is not None and entry['signature'] == signature and os.path.exists(entry['summary']['output']):
+            continue
+        pending.append((video_path, _output_path(video_path, output_dir, output_format), signature))
+
+    skipped = len(videos) - len(pending)
+    if skipped:
+        print(f"Skipping {skipped} files finished by an earlier run")
+
+    summaries = []
+    start_time = time.perf_counter()
+    with open(checkpoint_path, 'a') as checkpoint, ProcessPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {
+            executor.submit(_process_in_worker, video_path, output_path, settings): (video_path, signature)
+            for video_path, output_path, signature in pending
+        }
+        for future in as_completed(futures):
+            video_path, signature = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                print(f"Error processing {video_path}: {str(e)}")
+                continue
+
+            checkpoint.write(json.dumps({'signature': signature, 'summary': summary}) + '\n')
+            checkpoint.flush()
+            summaries.append(summary)
+            print(
+                f"{video_path}: {summary['frames']} frames, {summary['movement_pairs']}/{summary['pairs']} "
+                f"pairs with movement, {summary['frames'] / max(summary['seconds'], 1e-9):.1f} frames/s"
+            )
+
+    _print_totals(summaries, time.perf_counter() - start_time)
+    return summaries
+
+
+def _print_totals(summaries: List[Dict], wall_seconds: float):
+    """Print the throughput of the whole run"""
+    frames = sum(summary['frames'] for summary in summaries)
+    video_seconds = sum(summary['video_seconds'] for summary in summaries)
+    print(
+        f"Processed {len(summaries)} files, {frames} frames in {wall_seconds:.1f}s: "
+        f"{frames / max(wall_seconds, 1e-9):.1f} frames/s, {len(summaries) / max(wall_seconds, 1e-9) * 3600:.0f} files/h"
+    )
+    if video_seconds:
+        print(f"Video time covered per wall second: {video_seconds / max(wall_seconds, 1e-9):.1f}x real time")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Detect camera movement in video files without the web app")
+    parser.add_argument('inputs', nargs='+', help="Video files, glob patterns or directories")
+    parser.add_argument('--output-dir', default='movement_results')
+    parser.add_argument('--format', default='jsonl', choices=OUTPUT_FORMATS)
+    parser.add_argument('--method', default='auto', choices=movement_detector.DETECTION_METHODS)
+    parser.add_argument('--threshold', default=50.0, type=float)
+    parser.add_argument('--step', default=1, type=int, help="Analyze every step-th frame")
+    parser.add_argument('--max-width', type=int, help="Downscale frames wider than this while decoding")
+    parser.add_argument('--processing-width', type=int, help="Detector processing width")
+    parser.add_argument('--details', action='store_true', help="Include the detector details in every record")
+    parser.add_argument('--workers', default=os.cpu_count() or 1, type=int, help="Files processed concurrently")
+    parser.add_argument('--checkpoint', help="Checkpoint file (defaults to checkpoint.jsonl in the output directory)")
+    parser.add_argument('--no-resume', action='store_true', help="Reprocess files finished by an earlier run")
+    args = parser.parse_args(argv)
+
+    if args.format == 'parquet':
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            parser.error("--format parquet requires pyarrow")
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        parser.error("No video files found")
+
+    settings = {
+        'method': args.method,
+        'threshold': args.threshold,
+        'step': max(1, args.step),
+        'max_width': args.max_width,
+        'processing_width': args.processing_width,
+        'include_details': args.details
+    }
+    run_batch(videos, args.output_dir, settings, args.format, args.workers, args.checkpoint, not args.no_resume)
+
+
+if __name__ == '__main__':
+    main()
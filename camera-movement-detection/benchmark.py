@@ -0,0 +1,232 @@
+"""
+Benchmark harness for the camera movement detectors.
+
+Runs detection methods over synthetic sequences with known camera motion and
+reports throughput, per-pair and per-stage latency percentiles, peak traced
+memory and precision/recall against the ground truth.
+
+    python benchmark.py --resolutions 640x360 1280x720 --lengths 30 90
+
+With --startup it instead measures the cold import and detector construction
+time in fresh interpreters, optionally failing above a budget:
+
+    python benchmark.py --startup --startup-budget-ms 500
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+import movement_detector
+import synthetic_motion
+
+
+# Runs in a fresh interpreter so nothing is imported or cached yet
+_STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import movement_detector
+imported = time.perf_counter()
+detector = movement_detector.CameraMovementDetector()
+constructed = time.perf_counter()
+detector.orb
+print(imported - start, constructed - imported, time.perf_counter() - constructed)
+"""
+
+
+def measure_startup(repeats: int = 5) -> Dict:
+    """Median cold import, detector construction and first ORB use times in milliseconds"""
+    samples = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-c', _STARTUP_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append([float(value) * 1000.0 for value in output.split()])
+    import_ms, construct_ms, orb_ms = np.median(samples, axis=0)
+    return {
+        'import_ms': float(import_ms),
+        'construct_ms': float(construct_ms),
+        'first_orb_ms': float(orb_ms),
+        'startup_ms': float(import_ms + construct_ms)
+    }
+
+
+def _parse_resolution(text: str) -> Tuple[int, int]:
+    """Parse a WIDTHxHEIGHT string"""
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def _run_sequences(sequences: List[Dict], method: str, threshold: float,
+                   profiler: Optional[movement_detector.StageProfiler] = None) -> Tuple[List[float], List[np.ndarray]]:
+    """Run one method over all sequences, timing every frame pair"""
+    latencies = []
+    predictions = []
+    for sequence in sequences:
+        detected = np.zeros(len(sequence['labels']), dtype=bool)
+        detector = movement_detector.CameraMovementDetector(profiler=profiler)
+        stream = movement_detector.detect_movement_stream(sequence['frames'], threshold, method, detector=detector)
+        while True:
+            start = time.perf_counter()
+            pair = next(stream, None)
+            if pair is None:
+                break
+            latencies.append(time.perf_counter() - start)
+            detected[pair['index'] - 1] = pair['movement_detected']
+        predictions.append(detected)
+    return latencies, predictions
+
+
+def _stage_percentiles(records: List[Dict]) -> Dict:
+    """Latency percentiles of every stage of every detector, from profiler records"""
+    samples = {}
+    for record in records:
+        for stage, milliseconds in record['timing_ms'].items():
+            samples.setdefault(f"{record['method']}.{stage}", []).append(milliseconds)
+    return {
+        name: {
+            'calls': len(values),
+            'p50': float(np.percentile(values, 50)),
+            'p90': float(np.percentile(values, 90)),
+            'p99': float(np.percentile(values, 99))
+        }
+        for name, values in samples.items()
+    }
+
+
+def _score(labels: np.ndarray, predictions: np.ndarray) -> Dict:
+    """Precision and recall of per-pair predictions"""
+    true_positives = int(np.sum(labels & predictions))
+    false_positives = int(np.sum(~labels & predictions))
+    false_negatives = int(np.sum(labels & ~predictions))
+    precision = true_positives / max(true_positives + false_positives, 1)
+    recall = true_positives / max(true_positives + false_negatives, 1)
+    return {
+        'precision': precision,
+        'recall': recall,
+        'false_positives': false_positives,
+        'false_negatives': false_negatives
+    }
+
+
+def benchmark_method(sequences: List[Dict], method: str, threshold: float = 50.0,
+                     measure_memory: bool = True) -> Dict:
+    """Benchmark one detection method over a list of synthetic sequences"""
+    profiler = movement_detector.StageProfiler(keep_records=True)
+    latencies, predictions = _run_sequences(sequences, method, threshold, profiler)
+    latencies_ms = np.array(latencies) * 1000.0
+
+    # Memory is traced in a separate run so tracing does not skew the timings
+    peak_memory_mb = None
+    if measure_memory:
+        tracemalloc.start()
+        _run_sequences(sequences, method, threshold)
+        peak_memory_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    labels = np.concatenate([sequence['labels'] for sequence in sequences])
+    result = {
+        'method': method,
+        'pairs': len(latencies),
+        'fps': len(latencies) / max(float(np.sum(latencies)), 1e-9),
+        'latency_ms': {
+            'p50': float(np.percentile(latencies_ms, 50)),
+            'p90': float(np.percentile(latencies_ms, 90)),
+            'p99': float(np.percentile(latencies_ms, 99))
+        },
+        'peak_memory_mb': peak_memory_mb,
+        'stage_latency_ms': _stage_percentiles(profiler.records)
+    }
+    result.update(_score(labels, np.concatenate(predictions)))
+    return result
+
+
+def run_benchmark(methods: List[str], resolutions: List[Tuple[int, int]], lengths: List[int],
+                  motions: Optional[List[str]] = None, threshold: float = 50.0,
+                  measure_memory: bool = True, seed: int = 0, show_stages: bool = False) -> List[Dict]:
+    """Benchmark every method for every resolution and sequence length"""
+    results = []
+    for width, height in resolutions:
+        for n_frames in lengths:
+            sequences = synthetic_motion.generate_suite(n_frames, width, height, motions, seed)
+            for method in methods:
+                result = benchmark_method(sequences, method, threshold, measure_memory)
+                result.update({'resolution': f"{width}x{height}", 'frames': n_frames})
+                results.append(result)
+                _print_row(result)
+                if show_stages:
+                    _print_stages(result)
+    return results
+
+
+def _print_row(result: Dict):
+    """Print one result line of the benchmark table"""
+    memory = f"{result['peak_memory_mb']:8.1f}" if result['peak_memory_mb'] is not None else f"{'-':>8}"
+    print(
+        f"{result['resolution']:>10} {result['frames']:>6} {result['method']:>17} "
+        f"{result['fps']:8.1f} {result['latency_ms']['p50']:8.2f} {result['latency_ms']['p90']:8.2f} "
+        f"{result['latency_ms']['p99']:8.2f} {memory} {result['precision']:6.2f} {result['recall']:6.2f}"
+    )
+
+
+def _print_stages(result: Dict):
+    """Print the per-stage latency percentiles below a result line"""
+    for name, stats in sorted(result['stage_latency_ms'].items()):
+        print(
+            f"{'':>35} {name:<40} calls={stats['calls']:<6} "
+            f"p50={stats['p50']:.2f} p90={stats['p90']:.2f} p99={stats['p99']:.2f} ms"
+        )
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark camera movement detectors on synthetic motion")
+    parser.add_argument('--methods', nargs='+', default=movement_detector.DETECTION_METHODS,
+                        choices=movement_detector.DETECTION_METHODS)
+    parser.add_argument('--motions', nargs='+', default=synthetic_motion.MOTIONS, choices=synthetic_motion.MOTIONS)
+    parser.add_argument('--resolutions', nargs='+', default=['640x360', '1280x720'], type=str)
+    parser.add_argument('--lengths', nargs='+', default=[30], type=int)
+    parser.add_argument('--threshold', default=50.0, type=float)
+    parser.add_argument('--seed', default=0, type=int)
+    parser.add_argument('--no-memory', action='store_true', help="Skip the traced peak memory run")
+    parser.add_argument('--stages', action='store_true', help="Print per-stage latency percentiles")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--startup', action='store_true', help="Only measure cold import and construction time")
+    parser.add_argument('--startup-repeats', default=5, type=int)
+    parser.add_argument('--startup-budget-ms', type=float, help="Exit with an error if startup exceeds this")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        startup = measure_startup(args.startup_repeats)
+        print(
+            f"import {startup['import_ms']:.1f} ms, construction {startup['construct_ms']:.3f} ms, "
+            f"first ORB use {startup['first_orb_ms']:.3f} ms (median of {args.startup_repeats} cold starts)"
+        )
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(startup, f, indent=2)
+        if args.startup_budget_ms is not None and startup['startup_ms'] > args.startup_budget_ms:
+            sys.exit(f"Startup {startup['startup_ms']:.1f} ms exceeds the budget of {args.startup_budget_ms:.1f} ms")
+        return
+
+    print(
+        f"{'resolution':>10} {'frames':>6} {'method':>17} {'fps':>8} {'p50 ms':>8} {'p90 ms':>8} "
+        f"{'p99 ms':>8} {'peak MB':>8} {'prec':>6} {'recall':>6}"
+    )
+    results = run_benchmark(
+        args.methods, [_parse_resolution(r) for r in args.resolutions], args.lengths,
+        args.motions, args.threshold, not args.no_memory, args.seed, args.stages
+    )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,239 @@
 import cv2
+import functools
+import threading
+import time
 import numpy as np
-from typing import List, Tuple, Dict, Optional
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+# Detection methods accepted by detect_significant_movement
+DETECTION_METHODS = ['auto', 'cascade', 'feature_matching', 'keyframe', 'optical_flow', 'tracked_flow',
+                     'grid_flow', 'phase_correlation', 'frame_difference']
+
+# Fields of cv2.DMatch results, extracted in one pass per match list
+_MATCH_DTYPE = np.dtype([('query', np.int32), ('train', np.int32), ('distance', np.float32)])
+_KNN_MATCH_DTYPE = np.dtype(_MATCH_DTYPE.descr + [('second_distance', np.float32)])
+
+# Per-frame data each method needs, computed from a single frame. Cascade only
+# needs the cheap diff image for most pairs and tracked flow re-detects corners
+# only when its tracks run out, so their expensive features stay lazy.
+_PRECOMPUTABLE_FEATURES = {
+    'auto': ('orb', 'corners', 'diff'),
+    'cascade': ('diff',),
+    'feature_matching': ('orb',),
+    'keyframe': ('orb',),
+    'optical_flow': ('corners',),
+    'tracked_flow': (),
+    'grid_flow': (),
+    'phase_correlation': ('spectrum',),
+    'frame_difference': ('diff',)
+}
+
+
+class _StageTimer:
+    """Context manager adding the wall time of one stage to the current detector call"""
+
+    __slots__ = ('profiler', 'stage', 'start')
+
+    def __init__(self, profiler: 'StageProfiler', stage: str):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.profiler._add(self.stage, time.perf_counter() - self.start)
+
+
+class StageProfiler:
+    """
+    Opt-in wall time and call count instrumentation for CameraMovementDetector.
+    
+    Pass an instance as the detector's profiler. Every detector call produces a
+    record of its per-stage times, which is aggregated into summary(), kept in
+    records when keep_records is set, passed to callback and added to the
+    result details as 'timing_ms'.
+
+    Call stacks and frame_index are kept per thread, so one profiler can be
+    shared by detector calls on several threads (as in DetectionPipeline);
+    the aggregated totals are guarded by a lock. Work done ahead of matching
+    by precompute_features is recorded under its own 'precompute' method.
+    """
+
+    def __init__(self, callback: Optional[Callable[[Dict], None]] = None, keep_records: bool = False):
+        self.callback = callback
+        self.keep_records = keep_records
+        self.reset()
+
+    def reset(self):
+        """Clear all collected timings"""
+        self.records = []
+        self._totals = {}   # method -> [calls, seconds, {stage: [calls, seconds]}]
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def _stack(self) -> List:
+        """Stage timings of the detector calls in progress on the current thread"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @property
+    def frame_index(self) -> Optional[int]:
+        """Index of the pair being processed on the current thread, set by detect_movement_stream"""
+        return getattr(self._local, 'frame_index', None)
+
+    @frame_index.setter
+    def frame_index(self, idx: Optional[int]):
+        self._local.frame_index = idx
+
+    def stage(self, stage: str) -> _StageTimer:
+        """Context manager timing one stage of the current detector call"""
+        return _StageTimer(self, stage)
+
+    def _add(self, stage: str, seconds: float):
+        """Attribute stage time to the innermost detector call"""
+        if self._stack:
+            stages = self._stack[-1][1]
+            stages[stage] = stages.get(stage, 0.0) + seconds
+
+    def _begin(self, method: str):
+        self._stack.append((method, {}, time.perf_counter()))
+
+    def _end(self, result: Optional[Dict]):
+        method, stages, start = self._stack.pop()
+        elapsed = time.perf_counter() - start
+        
+        with self._lock:
+            totals = self._totals.setdefault(method, [0, 0.0, {}])
+            totals[0] += 1
+            totals[1] += elapsed
+            for stage, seconds in stages.items():
+                stage_totals = totals[2].setdefault(stage, [0, 0.0])
+                stage_totals[0] += 1
+                stage_totals[1] += seconds
+        
+        timing_ms = {stage: seconds * 1000.0 for stage, seconds in stages.items()}
+        timing_ms['total'] = elapsed * 1000.0
+        if result is not None:
+            result.setdefault('details', {})['timing_ms'] = timing_ms
+        
+        record = {'index': self.frame_index, 'method': method, 'timing_ms': timing_ms}
+        if self.keep_records:
+            with self._lock:
+                self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def summary(self) -> Dict:
+        """Aggregated calls and wall time per method and per stage"""
+        with self._lock:
+            return {
+                method: {
+                    'calls': calls,
+                    'total_ms': seconds * 1000.0,
+                    'mean_ms': seconds * 1000.0 / max(calls, 1),
+                    'stages': {
+                        stage: {
+                            'calls': stage_calls,
+                            'total_ms': stage_seconds * 1000.0,
+                            'mean_ms': stage_seconds * 1000.0 / max(stage_calls, 1)
+                        }
+                        for stage, (stage_calls, stage_seconds) in stages.items()
+                    }
+                }
+                for method, (calls, seconds, stages) in self._totals.items()
+            }
+
+
+def _profiled(method: str):
+    """Wrap a detector method so its calls are recorded when a profiler is set"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if profiler is None:
+                return func(self, *args, **kwargs)
+            profiler._begin(method)
+            result = None
+            try:
+                result = func(self, *args, **kwargs)
+            finally:
+                # Only detection results carry details; precompute records its timings alone
+                profiler._end(result if isinstance(result, dict) else None)
+            return result
+        return wrapper
+    return decorator
+
+
+# Shared no-op context used for stages when profiling is disabled
+_NO_STAGE = nullcontext()
+
+
+def _downscale(image: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """Shrink an image to size (width, height), fast for non-integer ratios too"""
+    # INTER_AREA is only fast for integer factors, so it takes the largest
+    # integer step and bilinear sampling, under 2x, does the rest
+    height, width = image.shape[:2]
+    factor = int(min(width / size[0], height / size[1]))
+    if factor >= 2:
+        image = cv2.resize(image, (width // factor, height // factor), interpolation=cv2.INTER_AREA)
+    if image.shape[1] == size[0] and image.shape[0] == size[1]:
+        return image
+    return cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+
+
+class FrameFeatures:
+    """Per-frame data shared by all detectors, computed lazily and at most once"""
+
+    __slots__ = ('frame', 'gray', 'scale', 'keypoints', 'keypoint_xy', 'descriptors', 'corners', 'diff_image',
+                 'spectrum', 'spectrum_image', 'spectrum_scale', 'log_polar_spectrum')
+
+    def __init__(self, frame: np.ndarray):
+        self.frame = frame
+        self.gray = None
+        self.scale = 1.0  # processing resolution / native resolution
+        self.keypoints = None
+        self.keypoint_xy = None  # keypoint coordinates as a contiguous float32 (N, 2) array
+        self.descriptors = None
+        self.corners = None
+        self.diff_image = None
+        self.spectrum = None            # FFT of the windowed, downscaled grayscale image
+        self.spectrum_image = None      # Downscaled, zero-mean float32 image the spectrum is taken of
+        self.spectrum_scale = 1.0       # spectrum image size / processing image size
+        self.log_polar_spectrum = None  # FFT of the log-polar magnitude spectrum
+
 
 class CameraMovementDetector:
     """Advanced Camera Movement Detection using multiple algorithms"""
     
-    def __init__(self):
-        # Initialize feature detectors
-        self.orb = cv2.ORB_create(nfeatures=1000)
-        self.sift = None
-        try:
-            self.sift = cv2.SIFT_create()
-        except AttributeError:
-            pass  # SIFT might not be available in some OpenCV builds
+    def __init__(self, cache_size: int = 2, processing_width: Optional[int] = None,
+                 pixel_budget: Optional[int] = None, profiler: Optional[StageProfiler] = None,
+                 mask: Optional[np.ndarray] = None, learn_mask_frames: int = 0):
+        # Optional instrumentation; costs one attribute check per stage when unset
+        self.profiler = profiler
+        
+        # Processing resolution shared by all detectors. Frames wider than
+        # processing_width or larger than pixel_budget pixels are downscaled
+        # once; reported distances are converted back to native pixels.
+        self.processing_width = processing_width
+        self.pixel_budget = pixel_budget
+        
+        # Feature detectors and matchers are created on first use (see the
+        # properties below), so detectors for cheap methods never build them
         
         # Parameters for different algorithms
         self.feature_matching_params = {
             'distance_threshold': 0.7,
             'min_match_count': 10,
             'ransac_threshold': 5.0,
-            'ransac_max_iters': 1000
+            'ransac_max_iters': 1000,
+            'matcher': 'cross_check',  # or 'knn' for 2-NN matching with a ratio test
+            'ratio': 0.8
         }
         
         self.optical_flow_params = {
@@ -36,59 +250,558 @@ class CameraMovementDetector:
             )
         }
 
-    def detect_with_feature_matching(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
-        """Detect camera movement using ORB feature matching"""
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
+        # Tracked flow mode: points are carried across frames and corners are
+        # only re-detected when too few tracks survive
+        self.tracking_params = {
+            'min_points': 40,
+            'fb_threshold': 1.0  # max forward-backward error in pixels
+        }
+        self.reset_tracking()
+
+        # Grid flow mode: a fixed grid of points, one per bucket, is tracked so
+        # the cost per pair is constant and flat or crowded regions cannot
+        # starve or dominate the global motion estimate
+        self.grid_flow_params = {
+            'grid_size': (16, 12),       # points per row and per column
+            'min_eig_threshold': 1e-5,   # LK drops points in fully textureless windows
+            'ransac_threshold': 1.5,     # pixels at processing resolution
+            'min_points': 12,
+            'min_inlier_ratio': 0.3
+        }
+        self._grid_points = {}  # processing resolution -> grid points inside the ROI mask
+
+        # Keyframe mode: frames are matched against a cached reference whose
+        # descriptors are computed once, which exposes slow cumulative drift
+        self.keyframe_params = {
+            'min_inliers': 20,
+            'min_inlier_ratio': 0.3,
+            'max_age': 300  # frames
+        }
+        self.reset_keyframe()
+
+        # Phase correlation mode: global translation (and optionally rotation
+        # and scale) from FFTs of windowed, downscaled grayscale images
+        self.phase_correlation_params = {
+            'width': 256,
+            'estimate_rotation_scale': False,
+            'min_response': 0.05
+        }
+        self._hanning_windows = {}
+
+        # Cascade mode: the cheap frame difference score, relative to the
+        # threshold, decides a pair on its own outside of the uncertainty band
+        self.cascade_params = {
+            'static_below': 0.5,
+            'movement_above': 4.0
+        }
+        self.reset_cascade_stats()
+
+        # Per-frame feature cache. Consecutive pairs share a frame, so a window
+        # of two lets every frame be converted and described exactly once.
+        # Frames must not be modified in place while they are cached.
+        self.cache_size = max(1, cache_size)
+        self._feature_cache = OrderedDict()
+
+        # ROI masking for fixed cameras: pixels outside the static mask, and
+        # pixels whose intensity varied strongly over the first learn_frames
+        # frames without camera movement (screens, trees, timestamps), are
+        # ignored by keypoint, corner and grid point selection and by frame differencing
+        self.mask_params = {
+            'learn_frames': learn_mask_frames,  # 0 disables the learned mask
+            'max_std': 25.0,  # gray levels; pixels varying more are dynamic
+            'dilate': 7,      # pixels (at diff resolution) dynamic regions are grown by
+            # A window with more dynamic pixels than this saw camera motion
+            # rather than a dynamic scene, so it is discarded and learning restarts
+            'max_dynamic_fraction': 0.25
+        }
+        self._static_mask = None
+        self.reset_mask_learning()
+        self.set_mask(mask)
+
+    @functools.cached_property
+    def orb(self):
+        """ORB detector used by the feature matching and keyframe methods"""
+        return cv2.ORB_create(nfeatures=1000)
+
+    @functools.cached_property
+    def sift(self):
+        """SIFT detector, or None when the OpenCV build lacks it"""
+        try:
+            return cv2.SIFT_create()
+        except AttributeError:
+            return None  # SIFT might not be available in some OpenCV builds
+
+    @functools.cached_property
+    def _cross_check_matcher(self):
+        return cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
+
+    @functools.cached_property
+    def _knn_matcher(self):
+        return cv2.BFMatcher(cv2.NORM_HAMMING)
+
+    def get_frame_features(self, frame: Union[np.ndarray, FrameFeatures]) -> FrameFeatures:
+        """Return the cached FrameFeatures for a frame, creating it on first use"""
+        if isinstance(frame, FrameFeatures):
+            return frame
         
-        # Detect keypoints and descriptors
-        kp1, des1 = self.orb.detectAndCompute(gray1, None)
-        kp2, des2 = self.orb.detectAndCompute(gray2, None)
+        # The cache keeps a reference to the frame, so its id cannot be reused
+        # by another live array while the entry exists
+        key = id(frame)
+        features = self._feature_cache.get(key)
+        if features is not None and features.frame is frame:
+            self._feature_cache.move_to_end(key)
+            return features
         
-        if des1 is None or des2 is None or len(kp1) < 10 or len(kp2) < 10:
-            return {'movement_detected': False, 'confidence': 0.0, 'method': 'feature_matching'}
+        features = FrameFeatures(frame)
+        self._feature_cache[key] = features
+        while len(self._feature_cache) > self.cache_size:
+            self._feature_cache.popitem(last=False)
         
-        # Match features
-        bf = cv2.BFMatcher(cv2.NORM_HAMMING, crossCheck=True)
-        matches = bf.match(des1, des2)
-        matches = sorted(matches, key=lambda x: x.distance)
+        if self.mask_learning:
+            self._accumulate_mask(features)
+        return features
+
+    @_profiled('precompute')
+    def precompute_features(self, frame: Union[np.ndarray, FrameFeatures],
+                            method: Optional[str] = None) -> FrameFeatures:
+        """
+        Compute the per-frame data of a detection method ahead of matching.
         
-        if len(matches) < self.feature_matching_params['min_match_count']:
-            return {'movement_detected': False, 'confidence': 0.0, 'method': 'feature_matching'}
+        Args:
+            frame: Frame or its FrameFeatures.
+            method: Detection method whose per-frame features are computed; only
+                the grayscale image at processing resolution when omitted.
+        
+        Returns:
+            The frame's FrameFeatures, ready to be passed to the detect methods.
+        """
+        features = self.get_frame_features(frame)
+        self._get_gray(features)
+        for name in _PRECOMPUTABLE_FEATURES[method] if method is not None else ():
+            if name == 'orb':
+                self._get_orb_features(features)
+            elif name == 'corners':
+                self._get_corners(features)
+            elif name == 'diff':
+                self._get_diff_image(features)
+            elif name == 'spectrum':
+                self._get_spectrum(features)
+        return features
+
+    def set_mask(self, mask: Optional[np.ndarray]):
+        """Set the static ROI mask at native resolution (nonzero = analyzed), or None to analyze everything"""
+        self._static_mask = None if mask is None else (np.asarray(mask) != 0).astype(np.uint8) * 255
+        # Features of cached frames were selected with the previous mask
+        self._invalidate_masks()
+        self.clear_cache()
+
+    def reset_mask_learning(self):
+        """Forget the learned mask and learn it again from the next learn_frames frames"""
+        self._learned_mask = None
+        self._mask_sum = None
+        self._mask_sq_sum = None
+        self._mask_frames = 0
+        self._invalidate_masks()
+
+    @property
+    def mask_learning(self) -> bool:
+        """Whether frames are still being accumulated for the learned mask"""
+        return self.mask_params['learn_frames'] > 0 and self._learned_mask is None
+
+    def _invalidate_masks(self):
+        """Drop the per-resolution mask buffers and the grid points selected with them"""
+        self._masks = {}
+        self._grid_points = {}
+
+    def _accumulate_mask(self, features: FrameFeatures):
+        """Add a frame to the per-pixel variance statistics and build the learned mask when complete
+
+        A complete window whose dynamic fraction exceeds max_dynamic_fraction is
+        dropped and the next learn_frames frames are accumulated instead.
+        """
+        image = self._get_diff_image(features)
+        # Local references: detect_pair may restart learning from another pipeline thread
+        mask_sum, mask_sq_sum = self._mask_sum, self._mask_sq_sum
+        if mask_sum is None or mask_sq_sum is None or mask_sum.shape != image.shape:
+            mask_sum = self._mask_sum = np.zeros(image.shape, np.float64)
+            mask_sq_sum = self._mask_sq_sum = np.zeros(image.shape, np.float64)
+            self._mask_frames = 0
         
-        # Filter good matches
-        good_matches = [m for m in matches if m.distance < self.feature_matching_params['distance_threshold'] * 255]
+        cv2.accumulate(image, mask_sum)
+        cv2.accumulateSquare(image, mask_sq_sum)
+        self._mask_frames += 1
+        n_frames = self._mask_frames
+        if n_frames < self.mask_params['learn_frames']:
+            return
         
-        if len(good_matches) < self.feature_matching_params['min_match_count']:
-            return {'movement_detected': False, 'confidence': 0.0, 'method': 'feature_matching'}
+        mean = mask_sum / n_frames
+        variance = np.maximum(mask_sq_sum / n_frames - mean**2, 0.0)
+        dynamic = (variance > self.mask_params['max_std']**2).astype(np.uint8) * 255
+        if self.mask_params['dilate'] > 0:
+            dynamic = cv2.dilate(dynamic, np.ones((self.mask_params['dilate'],) * 2, np.uint8))
+        self._mask_sum = self._mask_sq_sum = None
+        if cv2.countNonZero(dynamic) > self.mask_params['max_dynamic_fraction'] * dynamic.size:
+            return
+        self._learned_mask = cv2.bitwise_not(dynamic)
+        self._invalidate_masks()
+
+    def _get_mask(self, shape: Tuple[int, int]) -> Optional[np.ndarray]:
+        """uint8 ROI mask (255 = analyzed) for an image size, precomputed once per resolution"""
+        if self._static_mask is None and self._learned_mask is None:
+            return None
+        
+        mask = self._masks.get(shape)
+        if mask is None:
+            height, width = shape
+            mask = np.full(shape, 255, np.uint8)
+            for source in (self._static_mask, self._learned_mask):
+                if source is None:
+                    continue
+                if source.shape != shape:
+                    source = cv2.resize(source, (width, height), interpolation=cv2.INTER_NEAREST)
+                mask = cv2.bitwise_and(mask, source)
+            self._masks[shape] = mask
+        return mask
+
+    def _stage(self, stage: str):
+        """Timing context for one stage, a shared no-op when profiling is disabled"""
+        if self.profiler is None:
+            return _NO_STAGE
+        return self.profiler.stage(stage)
+
+    def reset_state(self):
+        """Reset all state carried between pairs (tracks, keyframe, cascade counters)"""
+        self.reset_tracking()
+        self.reset_keyframe()
+        self.reset_cascade_stats()
+
+    def reset_cascade_stats(self):
+        """Reset the per-stage hit counters of the cascade mode"""
+        self.cascade_stats = {
+            'pairs': 0,
+            'static': 0,       # decided static by the cheap stage
+            'movement': 0,     # decided moving by the cheap stage
+            'escalated': 0,    # passed on to feature matching and optical flow
+            'escalated_movement': 0
+        }
+
+    def reset_tracking(self):
+        """Forget the points carried over by the tracked flow mode"""
+        self._track_features = None
+        self._track_points = None
+
+    def clear_cache(self):
+        """Drop all cached per-frame features"""
+        self._feature_cache.clear()
+
+    def _processing_scale(self, width: int, height: int) -> float:
+        """Downscale factor for a frame size given the processing resolution settings"""
+        scale = 1.0
+        if self.processing_width is not None and width > self.processing_width:
+            scale = self.processing_width / width
+        if self.pixel_budget is not None and width * height > self.pixel_budget:
+            scale = min(scale, np.sqrt(self.pixel_budget / (width * height)))
+        return scale
+
+    def _get_gray(self, features: FrameFeatures) -> np.ndarray:
+        """Grayscale image of a frame at processing resolution (single-channel frames are used as-is)"""
+        if features.gray is None:
+            frame = features.frame
+            if frame.ndim == 3:
+                # Convert first so the resize filters one plane instead of three
+                with self._stage('cvtColor'):
+                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+            height, width = frame.shape[:2]
+            scale = self._processing_scale(width, height)
+            if scale < 1.0:
+                new_size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+                with self._stage('resize'):
+                    frame = _downscale(frame, new_size)
+                features.scale = new_size[0] / width
+            features.gray = frame
+        return features.gray
+
+    def _get_orb_features(self, features: FrameFeatures) -> Tuple:
+        """ORB keypoints and descriptors of a frame"""
+        if features.keypoints is None:
+            gray = self._get_gray(features)
+            with self._stage('detectAndCompute'):
+                features.keypoints, features.descriptors = self.orb.detectAndCompute(
+                    gray, self._get_mask(gray.shape[:2])
+                )
+            # Convert all keypoint coordinates in one C++ call
+            features.keypoint_xy = np.asarray(
+                cv2.KeyPoint_convert(features.keypoints), dtype=np.float32
+            ).reshape(-1, 2)
+        return features.keypoints, features.descriptors
+
+    def _match_descriptors(self, des1: np.ndarray, des2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Match descriptors and return the query/train indices of the good matches"""
+        params = self.feature_matching_params
+        
+        if params['matcher'] == 'knn':
+            with self._stage('match'):
+                knn_matches = self._knn_matcher.knnMatch(des1, des2, k=2)
+            
+            # Extract the best and second best candidates in one pass, then apply the ratio test
+            with self._stage('match_arrays'):
+                knn_matches = [m for m in knn_matches if len(m) == 2]
+                fields = np.fromiter(
+                    ((best.queryIdx, best.trainIdx, best.distance, second.distance) for best, second in knn_matches),
+                    _KNN_MATCH_DTYPE, len(knn_matches)
+                )
+                distance = fields['distance']
+            with self._stage('match_filter'):
+                keep = ((distance < params['distance_threshold'] * 255)
+                        & (distance < params['ratio'] * fields['second_distance']))
+        else:
+            with self._stage('match'):
+                matches = self._cross_check_matcher.match(des1, des2)
+            
+            # Every good match is kept regardless of order, so no sorting is needed
+            with self._stage('match_arrays'):
+                fields = np.fromiter(
+                    ((m.queryIdx, m.trainIdx, m.distance) for m in matches), _MATCH_DTYPE, len(matches)
+                )
+            if len(fields) < params['min_match_count']:
+                return fields['query'][:0], fields['train'][:0]
+            with self._stage('match_filter'):
+                keep = fields['distance'] < params['distance_threshold'] * 255
+        
+        return fields['query'][keep], fields['train'][keep]
+
+    def _get_corners(self, features: FrameFeatures) -> Optional[np.ndarray]:
+        """Shi-Tomasi corners of a frame used as optical flow seeds"""
+        if features.corners is None:
+            gray = self._get_gray(features)
+            with self._stage('goodFeaturesToTrack'):
+                corners = cv2.goodFeaturesToTrack(
+                    gray, mask=self._get_mask(gray.shape[:2]), **self.optical_flow_params['feature_params']
+                )
+            # An empty array marks "computed, nothing found" so it is not retried
+            features.corners = corners if corners is not None else np.empty((0, 1, 2), np.float32)
+        return features.corners
+
+    def _get_diff_image(self, features: FrameFeatures) -> np.ndarray:
+        """Processing image downscaled to at most 640px wide for frame differencing"""
+        if features.diff_image is None:
+            gray = self._get_gray(features)
+            height, width = gray.shape[:2]
+            if width > 640:
+                scale = 640.0 / width
+                new_width = int(width * scale)
+                new_height = int(height * scale)
+                with self._stage('resize'):
+                    gray = cv2.resize(gray, (new_width, new_height))
+            features.diff_image = gray
+        return features.diff_image
+
+    def _get_spectrum(self, features: FrameFeatures) -> np.ndarray:
+        """FFT of the windowed, downscaled grayscale image, shared by both pairs of a frame"""
+        if features.spectrum is None:
+            gray = self._get_gray(features)
+            height, width = gray.shape[:2]
+            target_width = self.phase_correlation_params['width']
+            if width > target_width:
+                new_size = (target_width, max(1, int(round(height * target_width / width))))
+                with self._stage('resize'):
+                    gray = _downscale(gray, new_size)
+                features.spectrum_scale = new_size[0] / width
+            
+            image = gray.astype(np.float32)
+            image -= image.mean()
+            features.spectrum_image = image
+            features.spectrum = self._windowed_spectrum(image)
+        return features.spectrum
+
+    def _windowed_spectrum(self, image: np.ndarray) -> np.ndarray:
+        """FFT of a zero-mean float32 image under a Hanning window"""
+        # A Hanning window suppresses the edge discontinuities of the FFT
+        shape = image.shape[:2]
+        window = self._hanning_windows.get(shape)
+        if window is None:
+            window = cv2.createHanningWindow((shape[1], shape[0]), cv2.CV_32F)
+            self._hanning_windows[shape] = window
+        with self._stage('fft'):
+            return np.fft.rfft2(image * window)
+
+    def _get_log_polar_spectrum(self, features: FrameFeatures) -> np.ndarray:
+        """FFT of the log-polar resampled magnitude spectrum (Fourier-Mellin)"""
+        if features.log_polar_spectrum is None:
+            spectrum = self._get_spectrum(features)
+            height = spectrum.shape[0]
+            width = (spectrum.shape[1] - 1) * 2
+            with self._stage('log_polar'):
+                # The magnitude is translation invariant; rotation and scale
+                # become shifts along the angle and log-radius axes
+                magnitude = np.abs(np.fft.fftshift(np.fft.fft2(np.fft.irfft2(spectrum, s=(height, width)))))
+                magnitude = np.log1p(magnitude).astype(np.float32)
+                # Resample to a square grid so both axes cover the same
+                # frequencies per pixel and image rotation stays a rotation
+                size = min(height, width)
+                magnitude = cv2.resize(magnitude, (size, size), interpolation=cv2.INTER_AREA)
+                center = (size / 2.0, size / 2.0)
+                log_polar = cv2.warpPolar(
+                    magnitude, (size, size), center, size / 2.0,
+                    cv2.WARP_POLAR_LOG | cv2.INTER_LINEAR
+                )
+                log_polar -= log_polar.mean()
+            with self._stage('fft'):
+                features.log_polar_spectrum = np.fft.rfft2(log_polar)
+        return features.log_polar_spectrum
+
+    def _correlate_spectra(self, spectrum1: np.ndarray, spectrum2: np.ndarray, shape: Tuple[int, int]) -> Tuple[float, float, float]:
+        """Sub-pixel shift (dx, dy) of image 2 relative to image 1 and the peak response"""
+        with self._stage('phase_correlate'):
+            cross_power = spectrum2 * np.conj(spectrum1)
+            cross_power /= np.abs(cross_power) + 1e-9
+            correlation = np.fft.irfft2(cross_power, s=shape)
+            
+            peak_y, peak_x = np.unravel_index(np.argmax(correlation), shape)
+            response = float(correlation[peak_y, peak_x])
+            
+            # Weighted centroid of the 5x5 neighbourhood (wrapping around) for sub-pixel accuracy
+            offsets = np.arange(-2, 3)
+            rows = (peak_y + offsets) % shape[0]
+            cols = (peak_x + offsets) % shape[1]
+            weights = np.clip(correlation[np.ix_(rows, cols)], 0, None)
+            total = weights.sum()
+            if total > 0:
+                peak_y = peak_y + float((weights.sum(axis=1) * offsets).sum() / total)
+                peak_x = peak_x + float((weights.sum(axis=0) * offsets).sum() / total)
+            
+            # Peaks past the middle are negative shifts
+            dy = peak_y - shape[0] if peak_y > shape[0] / 2 else peak_y
+            dx = peak_x - shape[1] if peak_x > shape[1] / 2 else peak_x
+        return dx, dy, response
+
+    @_profiled('phase_correlation')
+    def detect_with_phase_correlation(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
+        """Detect camera movement from the global shift estimated by FFT phase correlation"""
+        features1 = self.get_frame_features(frame1)
+        features2 = self.get_frame_features(frame2)
+        spectrum1 = self._get_spectrum(features1)
+        spectrum2 = self._get_spectrum(features2)
+        shape = (spectrum1.shape[0], (spectrum1.shape[1] - 1) * 2)
+        
+        # Rotation and scale come first (Fourier-Mellin): the log-polar
+        # magnitude spectra do not depend on the translation, which is then
+        # measured on frame 2 with the rotation and scale undone
+        estimate_rotation_scale = self.phase_correlation_params['estimate_rotation_scale']
+        rotation, scale = 0.0, 1.0
+        if estimate_rotation_scale:
+            log_polar1 = self._get_log_polar_spectrum(features1)
+            log_polar2 = self._get_log_polar_spectrum(features2)
+            size = log_polar1.shape[0]
+            log_radius_shift, angle_shift, _ = self._correlate_spectra(log_polar1, log_polar2, (size, size))
+            # The magnitude spectrum is symmetric, so rotation is only known modulo 180 degrees
+            rotation = (angle_shift * 360.0 / size + 90.0) % 180.0 - 90.0
+            scale = float(np.exp(-log_radius_shift * np.log(size / 2.0) / size))
+        
+        # Frame 2 is warped by this about the image center to undo rotation and scale
+        derotation = np.vstack([
+            cv2.getRotationMatrix2D((shape[1] / 2.0, shape[0] / 2.0), rotation, 1.0 / scale), [0.0, 0.0, 1.0]
+        ])
+        if abs(rotation) > 0.1 or abs(scale - 1.0) > 0.001:
+            with self._stage('derotate'):
+                derotated = cv2.warpAffine(
+                    features2.spectrum_image, derotation[:2], (shape[1], shape[0]), flags=cv2.INTER_LINEAR
+                )
+            spectrum2 = self._windowed_spectrum(derotated)
+        
+        dx, dy, response = self._correlate_spectra(spectrum1, spectrum2, shape)
+        
+        # A weak correlation peak means the translation is unreliable; rotation
+        # and scale are estimated independently and still count
+        if response < self.phase_correlation_params['min_response']:
+            if not estimate_rotation_scale:
+                return {'movement_detected': False, 'confidence': 0.0, 'method': 'phase_correlation'}
+            dx = dy = 0.0
+        
+        # Frame 1 maps to frame 2 by the shift followed by the inverse of the
+        # derotation, i.e. rotation and scale about the center; the transform
+        # is then expressed in native pixels
+        shift = np.array([[1.0, 0.0, dx], [0.0, 1.0, dy], [0.0, 0.0, 1.0]])
+        homography = np.linalg.inv(derotation) @ shift
+        to_native = 1.0 / (features1.spectrum_scale * features1.scale)
+        homography[:2, 2] *= to_native
+        movement_analysis = self._analyze_homography(homography)
+        
+        # Detect significant camera movement
+        is_camera_movement = _homography_decision(movement_analysis)
+        
+        return {
+            'movement_detected': is_camera_movement,
+            'confidence': movement_analysis['magnitude'],
+            'method': 'phase_correlation',
+            'details': {
+                'response': response,
+                'shift': [dx * to_native, dy * to_native],
+                'translation': movement_analysis['translation'],
+                'rotation': movement_analysis['rotation'],
+                'scale_change': movement_analysis['scale_change'],
+                'homography': homography.tolist()
+            }
+        }
+
+    def _estimate_homography(self, features1: FrameFeatures, features2: FrameFeatures) -> Optional[Tuple[np.ndarray, int, int]]:
+        """RANSAC homography from frame 1 to frame 2 in native pixels, with match and inlier counts"""
+        # Detect keypoints and descriptors (cached per frame)
+        kp1, des1 = self._get_orb_features(features1)
+        kp2, des2 = self._get_orb_features(features2)
+        
+        if des1 is None or des2 is None or len(kp1) < 10 or len(kp2) < 10:
+            return None
         
-        # Extract matched points
-        src_pts = np.float32([kp1[m.queryIdx].pt for m in good_matches]).reshape(-1, 1, 2)
-        dst_pts = np.float32([kp2[m.trainIdx].pt for m in good_matches]).reshape(-1, 1, 2)
+        # Match features and keep the good ones
+        query_idx, train_idx = self._match_descriptors(des1, des2)
+        n_good = len(query_idx)
+        
+        if n_good < self.feature_matching_params['min_match_count']:
+            return None
+        
+        # Gather matched points from the per-frame coordinate arrays
+        with self._stage('match_points'):
+            src_pts = features1.keypoint_xy[query_idx].reshape(-1, 1, 2)
+            dst_pts = features2.keypoint_xy[train_idx].reshape(-1, 1, 2)
         
         # Find homography with RANSAC
-        homography, mask = cv2.findHomography(
-            src_pts, dst_pts, 
-            cv2.RANSAC, 
-            self.feature_matching_params['ransac_threshold']
-        )
+        with self._stage('findHomography'):
+            homography, mask = cv2.findHomography(
+                src_pts, dst_pts, 
+                cv2.RANSAC, 
+                self.feature_matching_params['ransac_threshold']
+            )
         
         if homography is None:
+            return None
+        
+        # Express the homography in native pixels so thresholds do not depend
+        # on the processing resolution
+        if features1.scale != 1.0:
+            to_processing = np.diag([features1.scale, features1.scale, 1.0])
+            homography = np.linalg.inv(to_processing) @ homography @ to_processing
+        
+        inliers = int(np.sum(mask)) if mask is not None else 0
+        return homography, n_good, inliers
+
+    @_profiled('feature_matching')
+    def detect_with_feature_matching(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
+        """Detect camera movement using ORB feature matching"""
+        estimate = self._estimate_homography(self.get_frame_features(frame1), self.get_frame_features(frame2))
+        
+        if estimate is None:
             return {'movement_detected': False, 'confidence': 0.0, 'method': 'feature_matching'}
+        homography, n_good, inliers = estimate
         
         # Analyze transformation
         movement_analysis = self._analyze_homography(homography)
         
         # Calculate confidence based on inliers and transformation
-        inliers = np.sum(mask) if mask is not None else 0
-        inlier_ratio = inliers / len(good_matches)
+        inlier_ratio = inliers / n_good
         
         # Detect significant camera movement
-        is_camera_movement = (
-            movement_analysis['translation'] > 20 or  # pixels
-            movement_analysis['rotation'] > 5 or      # degrees  
-            movement_analysis['scale_change'] > 0.1   # 10% scale change
-        )
+        is_camera_movement = _homography_decision(movement_analysis)
         
         confidence = min(inlier_ratio * movement_analysis['magnitude'], 1.0)
         
@@ -97,8 +810,8 @@ class CameraMovementDetector:
             'confidence': confidence,
             'method': 'feature_matching',
             'details': {
-                'matches_found': len(good_matches),
-                'inliers': int(inliers),
+                'matches_found': n_good,
+                'inliers': inliers,
                 'inlier_ratio': inlier_ratio,
                 'translation': movement_analysis['translation'],
                 'rotation': movement_analysis['rotation'],
@@ -107,21 +820,97 @@ class CameraMovementDetector:
             }
         }
 
+    def reset_keyframe(self):
+        """Forget the keyframe and cumulative pose of the keyframe mode"""
+        self._keyframe = None
+        self._keyframe_pose = np.eye(3)
+        self._keyframe_age = 0
+
+    @_profiled('keyframe')
+    def detect_with_keyframe(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
+        """Detect camera movement of frame 2 relative to a cached keyframe"""
+        # The first pair seeds the keyframe; later pairs only use frame 2
+        if self._keyframe is None:
+            self._keyframe = self.get_frame_features(frame1)
+        features2 = self.get_frame_features(frame2)
+        keyframe = self._keyframe
+        self._keyframe_age += 1
+        
+        estimate = self._estimate_homography(keyframe, features2)
+        
+        if estimate is None:
+            # Nothing to chain through: restart from this frame with the pose kept
+            self._keyframe = features2
+            self._keyframe_age = 0
+            return {
+                'movement_detected': False,
+                'confidence': 0.0,
+                'method': 'keyframe',
+                'details': {'keyframe_replaced': 'tracking_lost'}
+            }
+        homography, n_good, inliers = estimate
+        inlier_ratio = inliers / n_good
+        
+        # Motion relative to the keyframe accumulates slow drift across pairs
+        movement_analysis = self._analyze_homography(homography)
+        is_camera_movement = _homography_decision(movement_analysis)
+        
+        # Cumulative pose maps the first frame into the current one
+        pose = homography @ self._keyframe_pose
+        pose /= pose[2, 2]
+        cumulative = self._analyze_homography(pose)
+        
+        # Replace the keyframe after confirmed movement or when the match budget is used up
+        params = self.keyframe_params
+        replaced = None
+        if is_camera_movement:
+            replaced = 'movement'
+        elif (inliers < params['min_inliers'] or inlier_ratio < params['min_inlier_ratio']
+              or self._keyframe_age >= params['max_age']):
+            replaced = 'drift_budget'
+        if replaced is not None:
+            self._keyframe = features2
+            self._keyframe_pose = pose
+            self._keyframe_age = 0
+        
+        return {
+            'movement_detected': is_camera_movement,
+            'confidence': min(inlier_ratio * movement_analysis['magnitude'], 1.0),
+            'method': 'keyframe',
+            'details': {
+                'matches_found': n_good,
+                'inliers': inliers,
+                'inlier_ratio': inlier_ratio,
+                'translation': movement_analysis['translation'],
+                'rotation': movement_analysis['rotation'],
+                'scale_change': movement_analysis['scale_change'],
+                'keyframe_replaced': replaced,
+                'cumulative_translation': cumulative['translation'],
+                'cumulative_rotation': cumulative['rotation'],
+                'cumulative_scale_change': cumulative['scale_change'],
+                'cumulative_pose': pose.tolist()
+            }
+        }
+
+    @_profiled('optical_flow')
     def detect_with_optical_flow(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
         """Detect camera movement using optical flow"""
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
+        features1 = self.get_frame_features(frame1)
+        features2 = self.get_frame_features(frame2)
+        gray1 = self._get_gray(features1)
+        gray2 = self._get_gray(features2)
         
         # Detect corners to track
-        corners = cv2.goodFeaturesToTrack(gray1, **self.optical_flow_params['feature_params'])
+        corners = self._get_corners(features1)
         
-        if corners is None or len(corners) < 10:
+        if len(corners) < 10:
             return {'movement_detected': False, 'confidence': 0.0, 'method': 'optical_flow'}
         
         # Calculate optical flow
-        new_corners, status, error = cv2.calcOpticalFlowPyrLK(
-            gray1, gray2, corners, None, **self.optical_flow_params['lk_params']
-        )
+        with self._stage('calcOpticalFlowPyrLK'):
+            new_corners, status, error = cv2.calcOpticalFlowPyrLK(
+                gray1, gray2, corners, None, **self.optical_flow_params['lk_params']
+            )
         
         # Filter good tracking points
         good_old = corners[status == 1]
@@ -130,17 +919,14 @@ class CameraMovementDetector:
         if len(good_old) < 10:
             return {'movement_detected': False, 'confidence': 0.0, 'method': 'optical_flow'}
         
-        # Calculate motion vectors
-        motion_vectors = good_new - good_old
+        # Calculate motion vectors in native pixels
+        motion_vectors = (good_new - good_old) / features1.scale
         
         # Analyze global motion
         global_motion = self._analyze_global_motion(motion_vectors)
         
         # Detect camera movement based on consistent global motion
-        is_camera_movement = (
-            global_motion['dominant_motion_strength'] > 0.6 and
-            global_motion['average_magnitude'] > 3.0
-        )
+        is_camera_movement = _global_motion_decision(global_motion)
         
         confidence = global_motion['dominant_motion_strength']
         
@@ -156,6 +942,144 @@ class CameraMovementDetector:
             }
         }
 
+    @_profiled('tracked_flow')
+    def detect_with_tracked_flow(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
+        """Detect camera movement using optical flow on points tracked across frames"""
+        features1 = self.get_frame_features(frame1)
+        features2 = self.get_frame_features(frame2)
+        
+        # Continue the existing tracks if this pair follows the previous one
+        redetected = False
+        points = self._track_points
+        if features1 is not self._track_features or points is None or len(points) < self.tracking_params['min_points']:
+            points = self._get_corners(features1)
+            redetected = True
+        
+        self.reset_tracking()
+        if len(points) < 10:
+            return {'movement_detected': False, 'confidence': 0.0, 'method': 'tracked_flow'}
+        
+        # Forward and backward flow on the cached grayscale images (the Python
+        # bindings do not accept prebuilt pyramids from buildOpticalFlowPyramid)
+        lk_params = self.optical_flow_params['lk_params']
+        gray1 = self._get_gray(features1)
+        gray2 = self._get_gray(features2)
+        with self._stage('calcOpticalFlowPyrLK'):
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(gray1, gray2, points, None, **lk_params)
+            back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(gray2, gray1, new_points, None, **lk_params)
+        
+        # Keep tracks that return to where they started
+        fb_error = np.linalg.norm((points - back_points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.tracking_params['fb_threshold'])
+        good_old = points[good].reshape(-1, 2)
+        good_new = new_points[good].reshape(-1, 2)
+        
+        # Surviving tracks seed the next pair
+        self._track_features = features2
+        self._track_points = good_new.reshape(-1, 1, 2)
+        
+        if len(good_old) < 10:
+            return {'movement_detected': False, 'confidence': 0.0, 'method': 'tracked_flow'}
+        
+        # Analyze global motion in native pixels
+        global_motion = self._analyze_global_motion((good_new - good_old) / features1.scale)
+        
+        # Detect camera movement based on consistent global motion
+        is_camera_movement = _global_motion_decision(global_motion)
+        
+        return {
+            'movement_detected': is_camera_movement,
+            'confidence': global_motion['dominant_motion_strength'],
+            'method': 'tracked_flow',
+            'details': {
+                'tracked_points': len(good_old),
+                'redetected': redetected,
+                'average_magnitude': global_motion['average_magnitude'],
+                'dominant_direction': global_motion['dominant_direction'],
+                'motion_consistency': global_motion['dominant_motion_strength']
+            }
+        }
+
+    def _get_grid_points(self, shape: Tuple[int, int]) -> np.ndarray:
+        """Centers of the grid buckets inside the ROI mask for an image size, computed once per resolution"""
+        points = self._grid_points.get(shape)
+        if points is None:
+            height, width = shape
+            columns, rows = self.grid_flow_params['grid_size']
+            # Keep the LK windows inside the image
+            margin_x, margin_y = self.optical_flow_params['lk_params']['winSize']
+            xs = np.linspace(margin_x, width - 1 - margin_x, columns)
+            ys = np.linspace(margin_y, height - 1 - margin_y, rows)
+            points = np.stack(np.meshgrid(xs, ys), axis=-1).reshape(-1, 1, 2).astype(np.float32)
+            mask = self._get_mask(shape)
+            if mask is not None:
+                xy = np.round(points.reshape(-1, 2)).astype(int)
+                points = points[mask[xy[:, 1], xy[:, 0]] > 0]
+            self._grid_points[shape] = points
+        return points
+
+    @_profiled('grid_flow')
+    def detect_with_grid_flow(self, frame1: np.ndarray, frame2: np.ndarray) -> Dict:
+        """Detect camera movement from a robust affine fit to LK flow on a fixed point grid"""
+        features1 = self.get_frame_features(frame1)
+        features2 = self.get_frame_features(frame2)
+        gray1 = self._get_gray(features1)
+        gray2 = self._get_gray(features2)
+        params = self.grid_flow_params
+        
+        # One batched LK call over every grid point
+        points = self._get_grid_points(gray1.shape[:2])
+        with self._stage('calcOpticalFlowPyrLK'):
+            new_points, status, _ = cv2.calcOpticalFlowPyrLK(
+                gray1, gray2, points, None, minEigThreshold=params['min_eig_threshold'],
+                **self.optical_flow_params['lk_params']
+            )
+        
+        tracked = status.ravel() == 1
+        good_old = points[tracked].reshape(-1, 2)
+        good_new = new_points[tracked].reshape(-1, 2)
+        
+        if len(good_old) < params['min_points']:
+            return {'movement_detected': False, 'confidence': 0.0, 'method': 'grid_flow'}
+        
+        # Rotation, uniform scale and translation; points on moving objects are outliers
+        with self._stage('estimateAffinePartial2D'):
+            affine, inlier_mask = cv2.estimateAffinePartial2D(
+                good_old, good_new, method=cv2.RANSAC, ransacReprojThreshold=params['ransac_threshold']
+            )
+        
+        if affine is None:
+            return {'movement_detected': False, 'confidence': 0.0, 'method': 'grid_flow'}
+        
+        inliers = int(inlier_mask.sum())
+        inlier_ratio = inliers / len(good_old)
+        if inlier_ratio < params['min_inlier_ratio']:
+            return {'movement_detected': False, 'confidence': 0.0, 'method': 'grid_flow'}
+        
+        # Express the model in native pixels and analyze it like a homography
+        homography = np.vstack([affine, [0.0, 0.0, 1.0]])
+        homography[:2, 2] /= features1.scale
+        movement_analysis = self._analyze_homography(homography)
+        
+        # Detect significant camera movement
+        is_camera_movement = _homography_decision(movement_analysis)
+        
+        return {
+            'movement_detected': is_camera_movement,
+            'confidence': min(inlier_ratio * movement_analysis['magnitude'], 1.0),
+            'method': 'grid_flow',
+            'details': {
+                'grid_points': len(points),
+                'tracked_points': len(good_old),
+                'inliers': inliers,
+                'inlier_ratio': inlier_ratio,
+                'translation': movement_analysis['translation'],
+                'rotation': movement_analysis['rotation'],
+                'scale_change': movement_analysis['scale_change'],
+                'homography': homography.tolist()
+            }
+        }
+
     def _analyze_homography(self, homography: np.ndarray) -> Dict:
         """Analyze homography matrix to extract transformation parameters"""
         # Decompose homography to get transformation parameters
@@ -217,27 +1141,28 @@ class CameraMovementDetector:
             'dominant_motion_strength': dominant_motion_strength
         }
 
+    @_profiled('frame_difference')
     def detect_frame_difference(self, frame1: np.ndarray, frame2: np.ndarray, threshold: float = 50.0) -> Dict:
         """Basic frame differencing method (legacy support)"""
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_RGB2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_RGB2GRAY)
-        
-        # Resize for performance
-        height, width = gray1.shape[:2]
-        if width > 640:
-            scale = 640.0 / width
-            new_width = int(width * scale)
-            new_height = int(height * scale)
-            gray1 = cv2.resize(gray1, (new_width, new_height))
-            gray2 = cv2.resize(gray2, (new_width, new_height))
-        
-        diff = cv2.absdiff(gray1, gray2)
-        score = np.mean(diff)
-        significant_pixels = np.sum(diff > 30) / diff.size * 100
+        # Downscaled grayscale images are cached per frame for performance
+        gray1 = self._get_diff_image(self.get_frame_features(frame1))
+        gray2 = self._get_diff_image(self.get_frame_features(frame2))
+        
+        mask = self._get_mask(gray1.shape[:2])
+        with self._stage('absdiff'):
+            diff = cv2.absdiff(gray1, gray2)
+            if mask is None:
+                score = np.mean(diff)
+                significant_pixels = np.sum(diff > 30) / diff.size * 100
+            else:
+                # Average over the analyzed pixels only
+                n_pixels = max(cv2.countNonZero(mask), 1)
+                diff = cv2.bitwise_and(diff, mask)
+                score = cv2.sumElems(diff)[0] / n_pixels
+                significant_pixels = np.count_nonzero(diff > 30) / n_pixels * 100
         combined_score = score + (significant_pixels * 2)
         
-        is_movement = combined_score > threshold
-        confidence = min(combined_score / (threshold * 2), 1.0)
+        is_movement, confidence = _frame_difference_decision(combined_score, threshold)
         
         return {
             'movement_detected': is_movement,
@@ -250,14 +1175,261 @@ class CameraMovementDetector:
             }
         }
 
-def detect_significant_movement(frames: List[np.ndarray], threshold: float = 50.0, method: str = 'auto') -> List[int]:
+    @_profiled('cascade')
+    def detect_with_cascade(self, frame1: np.ndarray, frame2: np.ndarray, threshold: float = 50.0) -> Dict:
+        """Coarse-to-fine detection: run the expensive detectors only on uncertain pairs"""
+        self.cascade_stats['pairs'] += 1
+        
+        # Stage 1: downscaled frame difference
+        cheap = self.detect_frame_difference(frame1, frame2, threshold)
+        relative_score = cheap['details']['combined_score'] / threshold
+        
+        if relative_score < self.cascade_params['static_below']:
+            self.cascade_stats['static'] += 1
+            movement_detected, stage, stage_results = False, 'frame_difference', [cheap]
+        elif relative_score > self.cascade_params['movement_above']:
+            self.cascade_stats['movement'] += 1
+            movement_detected, stage, stage_results = True, 'frame_difference', [cheap]
+        else:
+            # Stage 2: homography and optical flow, fused as in 'auto' mode
+            self.cascade_stats['escalated'] += 1
+            stage_results = [
+                self.detect_with_feature_matching(frame1, frame2),
+                self.detect_with_optical_flow(frame1, frame2),
+                cheap
+            ]
+            movement_detected = _fuse_results(stage_results)
+            stage = 'full'
+            if movement_detected:
+                self.cascade_stats['escalated_movement'] += 1
+        
+        confidence = 0.0
+        if movement_detected:
+            confidence = max(r['confidence'] for r in stage_results if r['movement_detected'])
+        
+        return {
+            'movement_detected': movement_detected,
+            'confidence': confidence,
+            'method': 'cascade',
+            'details': {
+                'stage': stage,
+                'relative_score': relative_score,
+                'stage_results': stage_results
+            }
+        }
+
+
+def _frame_difference_decision(combined_score: float, threshold: float) -> Tuple[bool, float]:
+    """Movement decision and confidence of a frame difference score for a threshold"""
+    return combined_score > threshold, min(combined_score / (threshold * 2), 1.0)
+
+
+def _homography_decision(movement_analysis: Dict) -> bool:
+    """Movement decision of a camera motion model analyzed by _analyze_homography"""
+    return (
+        movement_analysis['translation'] > 20 or  # pixels
+        movement_analysis['rotation'] > 5 or      # degrees
+        movement_analysis['scale_change'] > 0.1   # 10% scale change
+    )
+
+
+def _global_motion_decision(global_motion: Dict) -> bool:
+    """Movement decision of consistent global motion from _analyze_global_motion"""
+    return (
+        global_motion['dominant_motion_strength'] > 0.6 and
+        global_motion['average_magnitude'] > 3.0
+    )
+
+
+def _fuse_results(results: List[Dict]) -> bool:
+    """Weighted voting over the results of several detectors ('auto' fusion)"""
+    weighted_score = 0
+    total_weight = 0
+    
+    for result in results:
+        if result['movement_detected']:
+            weight = result['confidence']
+            if result['method'] == 'feature_matching':
+                weight *= 1.5  # Higher weight for feature matching
+            elif result['method'] == 'optical_flow':
+                weight *= 1.2  # Medium weight for optical flow
+            
+            weighted_score += weight
+            total_weight += 1
+    
+    # Movement detected if weighted average confidence > 0.3
+    return (weighted_score / max(total_weight, 1)) > 0.3
+
+
+def detect_pair(detector: CameraMovementDetector, frame1: np.ndarray, frame2: np.ndarray,
+                threshold: float = 50.0, method: str = 'auto') -> Tuple[bool, List[Dict]]:
+    """Run the requested detectors on one frame pair and fuse their results"""
+    learning = detector.mask_learning
+    movement_detected, results = _detect_pair(detector, frame1, frame2, threshold, method)
+    if learning and movement_detected:
+        # The warm-up window saw camera motion, which would mask most of the image
+        detector.reset_mask_learning()
+    return movement_detected, results
+
+
+def _detect_pair(detector: CameraMovementDetector, frame1: np.ndarray, frame2: np.ndarray,
+                 threshold: float, method: str) -> Tuple[bool, List[Dict]]:
+    """detect_pair without the mask learning restart"""
+    if method == 'cascade':
+        result = detector.detect_with_cascade(frame1, frame2, threshold)
+        return result['movement_detected'], [result]
+    
+    results = []
+    
+    if method in ['auto', 'feature_matching']:
+        result = detector.detect_with_feature_matching(frame1, frame2)
+        results.append(result)
+    
+    if method in ['auto', 'optical_flow']:
+        result = detector.detect_with_optical_flow(frame1, frame2)
+        results.append(result)
+    
+    if method == 'keyframe':
+        result = detector.detect_with_keyframe(frame1, frame2)
+        results.append(result)
+    
+    if method == 'tracked_flow':
+        result = detector.detect_with_tracked_flow(frame1, frame2)
+        results.append(result)
+    
+    if method == 'grid_flow':
+        result = detector.detect_with_grid_flow(frame1, frame2)
+        results.append(result)
+    
+    if method == 'phase_correlation':
+        result = detector.detect_with_phase_correlation(frame1, frame2)
+        results.append(result)
+    
+    if method in ['auto', 'frame_difference'] or len(results) == 0:
+        result = detector.detect_frame_difference(frame1, frame2, threshold)
+        results.append(result)
+    
+    return _decide(results, method), results
+
+
+def _decide(results: List[Dict], method: str) -> bool:
+    """Final movement decision of a pair from its detector results"""
+    # Fusion of multiple methods for 'auto' mode
+    if method == 'auto' and len(results) > 1:
+        return _fuse_results(results)
+    return any(r['movement_detected'] for r in results)
+
+
+# Idle detectors shared by calls that do not pass their own detector, so
+# repeated calls skip construction and keep their lazily built ORB matchers
+_DETECTOR_POOL_SIZE = 4
+_detector_pool = []
+_detector_pool_lock = threading.Lock()
+
+
+def _acquire_detector() -> CameraMovementDetector:
+    """Take an idle detector from the shared pool, creating one if none is left"""
+    with _detector_pool_lock:
+        if _detector_pool:
+            return _detector_pool.pop()
+    return CameraMovementDetector()
+
+
+def _release_detector(detector: CameraMovementDetector):
+    """Return a pooled detector without any state of the sequence it processed"""
+    detector.reset_state()
+    detector.clear_cache()
+    with _detector_pool_lock:
+        if len(_detector_pool) < _DETECTOR_POOL_SIZE:
+            _detector_pool.append(detector)
+
+
+def init_pool_worker():
+    """Initializer of process pool workers that run detectors"""
+    # Parallelism comes from the pool; OpenCV's own threads would oversubscribe
+    cv2.setNumThreads(1)
+
+
+def _iter_source_frames(source: Union[Iterable[np.ndarray], cv2.VideoCapture]) -> Iterator[np.ndarray]:
+    """Yield frames from an iterable or an opened cv2.VideoCapture"""
+    if isinstance(source, cv2.VideoCapture):
+        while True:
+            ret, frame = source.read()
+            if not ret:
+                break
+            # Detectors only need grayscale, so skip the BGR to RGB conversion
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    else:
+        yield from source
+
+
+def detect_movement_stream(source: Union[Iterable[np.ndarray], cv2.VideoCapture], threshold: float = 50.0,
+                           method: str = 'auto',
+                           detector: Optional[CameraMovementDetector] = None) -> Iterator[Dict]:
+    """
+    Streaming variant of detect_significant_movement for unbounded sources.
+    
+    Only the previous frame and its cached features are kept alive, so memory
+    stays constant regardless of the length of the source.
+    
+    Args:
+        source: Iterable of RGB or grayscale frames, or an opened cv2.VideoCapture
+            (which is read until exhausted but not released).
+        threshold: Sensitivity threshold for detecting movement.
+        method: Detection method ('auto', 'cascade', 'feature_matching', 'keyframe', 'optical_flow',
+            'tracked_flow', 'grid_flow', 'phase_correlation', 'frame_difference')
+        detector: Detector instance to reuse; an idle one is taken from a shared pool
+            (and returned once the stream ends) when omitted.
+    
+    Yields:
+        One dict per processed pair with the index of the second frame, the fused
+        'movement_detected' decision and the individual detector 'results'.
+    """
+    if detector is None:
+        detector = _acquire_detector()
+        try:
+            yield from detect_movement_stream(source, threshold, method, detector)
+        finally:
+            _release_detector(detector)
+        return
+    
+    previous = None
+    for idx, frame in enumerate(_iter_source_frames(source)):
+        frame1, frame2 = previous, frame
+        previous = frame
+        if frame1 is None:
+            continue
+        
+        try:
+            # Ensure frames are valid
+            if frame1.shape != frame2.shape:
+                continue
+            
+            if detector.profiler is not None:
+                detector.profiler.frame_index = idx
+            movement_detected, results = detect_pair(detector, frame1, frame2, threshold, method)
+        except Exception as e:
+            print(f"Error processing frame {idx}: {str(e)}")
+            continue
+        
+        yield {
+            'index': idx,
+            'movement_detected': movement_detected,
+            'results': results
+        }
+
+
+def detect_significant_movement(frames: List[np.ndarray], threshold: float = 50.0, method: str = 'auto',
+                                detector: Optional[CameraMovementDetector] = None) -> List[int]:
     """
     Main function for detecting significant camera movement.
     
     Args:
         frames: List of image frames (as numpy arrays).
         threshold: Sensitivity threshold for detecting movement.
-        method: Detection method ('auto', 'feature_matching', 'optical_flow', 'frame_difference')
+        method: Detection method ('auto', 'cascade', 'feature_matching', 'keyframe', 'optical_flow',
+            'tracked_flow', 'grid_flow', 'phase_correlation', 'frame_difference')
+        detector: Detector instance to reuse, e.g. to read its cascade_stats afterwards.
     
     Returns:
         List of indices where significant movement is detected.
@@ -265,59 +1437,205 @@ def detect_significant_movement(frames: List[np.ndarray], threshold: float = 50.
     if len(frames) < 2:
         return []
     
-    detector = CameraMovementDetector()
-    movement_indices = []
+    return [
+        pair['index']
+        for pair in detect_movement_stream(frames, threshold, method, detector=detector)
+        if pair['movement_detected']
+    ]
+
+
+class MovementSegment(NamedTuple):
+    """A run of frames with camera movement (start and end are inclusive frame indices)"""
+    start: int
+    end: int
+    peak_confidence: float
+    motion_type: str
+
+
+def _flatten_results(results: List[Dict]) -> Iterator[Dict]:
+    """Yield detector results including the stage results nested in cascade results"""
+    for result in results:
+        yield result
+        yield from _flatten_results(result.get('details', {}).get('stage_results', []))
+
+
+def motion_type(pair_results: List[List[Dict]]) -> str:
+    """
+    Classify the camera motion of a segment from the details of its pairs.
+
+    Args:
+        pair_results: Detector results of every moving pair in the segment.
+
+    Returns:
+        'pan', 'tilt', 'rotation', 'zoom', 'shake' or 'unknown'.
+    """
+    vectors = []
+    rotation = 0.0
+    scale_change = 0.0
+    for results in pair_results:
+        for result in _flatten_results(results):
+            details = result.get('details', {})
+            if not result['movement_detected']:
+                continue
+            rotation = max(rotation, details.get('rotation', 0.0))
+            scale_change = max(scale_change, details.get('scale_change', 0.0))
+            if details.get('homography') is not None:
+                homography = details['homography']
+                vectors.append((homography[0][2], homography[1][2]))
+                break
+            if 'dominant_direction' in details:
+                angle = np.deg2rad(details['dominant_direction'])
+                magnitude = details['average_magnitude']
+                vectors.append((magnitude * np.cos(angle), magnitude * np.sin(angle)))
+                break
     
-    for idx in range(1, len(frames)):
-        try:
-            frame1 = frames[idx-1]
-            frame2 = frames[idx]
-            
-            # Ensure frames are valid
-            if frame1.shape != frame2.shape:
+    if scale_change > 0.1:
+        return 'zoom'
+    if rotation > 5:
+        return 'rotation'
+    if not vectors:
+        return 'unknown'
+    
+    vectors = np.array(vectors)
+    total = vectors.sum(axis=0)
+    # Back-and-forth motion largely cancels out over the segment
+    if len(vectors) > 1 and np.linalg.norm(total) < 0.5 * np.linalg.norm(vectors, axis=1).sum():
+        return 'shake'
+    return 'pan' if abs(total[0]) >= abs(total[1]) else 'tilt'
+
+
+class MovementResults:
+    """
+    Per-pair results of a detection run with segment and membership queries.
+    
+    Arrays are indexed by frame: entry i describes the pair (i-1, i) and entry
+    0 is always empty. scores and flags hold the confidence and decision of
+    every detector that ran (NaN / False where it did not), detected the fused
+    decision, and details the raw per-pair results for later inspection.
+    """
+
+    def __init__(self, n_frames: int, pairs: List[Dict], method: str, threshold: float,
+                 max_gap: int = 2, min_length: int = 1):
+        self.n_frames = n_frames
+        self.method = method
+        self.threshold = threshold
+        self.max_gap = max_gap
+        self.min_length = min_length
+        
+        self.detected = np.zeros(n_frames, dtype=bool)
+        self.confidence = np.zeros(n_frames, dtype=np.float32)
+        self.scores = {}
+        self.flags = {}
+        self.details = {}
+        
+        for pair in pairs:
+            idx = pair['index']
+            self.details[idx] = pair['results']
+            self.detected[idx] = pair['movement_detected']
+            for result in _flatten_results(pair['results']):
+                name = result['method']
+                if name not in self.scores:
+                    self.scores[name] = np.full(n_frames, np.nan, dtype=np.float32)
+                    self.flags[name] = np.zeros(n_frames, dtype=bool)
+                self.scores[name][idx] = result['confidence']
+                self.flags[name][idx] = result['movement_detected']
+            if pair['movement_detected']:
+                self.confidence[idx] = max(
+                    (r['confidence'] for r in pair['results'] if r['movement_detected']), default=0.0
+                )
+        
+        self.segments = self._build_segments()
+
+    def _build_segments(self) -> List[MovementSegment]:
+        """Merge detections separated by at most max_gap static pairs into segments"""
+        segments = []
+        indices = np.flatnonzero(self.detected)
+        if len(indices) == 0:
+            return segments
+        
+        # Split wherever the gap between consecutive detections is too large
+        breaks = np.flatnonzero(np.diff(indices) > self.max_gap + 1)
+        starts = np.concatenate([[indices[0]], indices[breaks + 1]])
+        ends = np.concatenate([indices[breaks], [indices[-1]]])
+        
+        for start, end in zip(starts, ends):
+            if end - start + 1 < self.min_length:
                 continue
-            
-            results = []
-            
-            if method in ['auto', 'feature_matching']:
-                result = detector.detect_with_feature_matching(frame1, frame2)
-                results.append(result)
-            
-            if method in ['auto', 'optical_flow']:
-                result = detector.detect_with_optical_flow(frame1, frame2)
-                results.append(result)
-            
-            if method in ['auto', 'frame_difference'] or len(results) == 0:
-                result = detector.detect_frame_difference(frame1, frame2, threshold)
-                results.append(result)
-            
-            # Fusion of multiple methods for 'auto' mode
-            if method == 'auto' and len(results) > 1:
-                # Use weighted voting
-                weighted_score = 0
-                total_weight = 0
-                
-                for result in results:
-                    if result['movement_detected']:
-                        weight = result['confidence']
-                        if result['method'] == 'feature_matching':
-                            weight *= 1.5  # Higher weight for feature matching
-                        elif result['method'] == 'optical_flow':
-                            weight *= 1.2  # Medium weight for optical flow
-                        
-                        weighted_score += weight
-                        total_weight += 1
-                
-                # Movement detected if weighted average confidence > 0.3
-                movement_detected = (weighted_score / max(total_weight, 1)) > 0.3
-            else:
-                movement_detected = any(r['movement_detected'] for r in results)
-            
-            if movement_detected:
-                movement_indices.append(idx)
-                
-        except Exception as e:
-            print(f"Error processing frame {idx}: {str(e)}")
-            continue
+            pair_results = [self.details[i] for i in range(start, end + 1) if self.detected[i]]
+            segments.append(MovementSegment(
+                int(start), int(end),
+                float(self.confidence[start:end + 1].max()),
+                motion_type(pair_results)
+            ))
+        return segments
+
+    @property
+    def indices(self) -> List[int]:
+        """Indices of frames with detected movement, as returned by detect_significant_movement"""
+        return np.flatnonzero(self.detected).tolist()
+
+    @property
+    def index_set(self) -> frozenset:
+        """Indices of frames with detected movement as a set"""
+        return frozenset(self.indices)
+
+    def rethreshold(self, threshold: float) -> 'MovementResults':
+        """
+        Re-apply a different threshold to the stored raw scores without re-running detectors.
+        
+        Only frame difference decisions depend on the threshold. Cascade results
+        cannot be re-thresholded because the threshold also decides which
+        detectors ran.
+        """
+        if self.method == 'cascade':
+            raise ValueError("Cascade results depend on the threshold through their routing; re-run the detection")
+        
+        pairs = []
+        for idx, results in self.details.items():
+            updated = []
+            for result in results:
+                if result['method'] == 'frame_difference' and 'details' in result:
+                    movement_detected, confidence = _frame_difference_decision(
+                        result['details']['combined_score'], threshold
+                    )
+                    result = dict(result, movement_detected=movement_detected, confidence=confidence)
+                updated.append(result)
+            pairs.append({'index': idx, 'movement_detected': _decide(updated, self.method), 'results': updated})
+        return MovementResults(self.n_frames, pairs, self.method, threshold, self.max_gap, self.min_length)
+
+    def __contains__(self, idx: int) -> bool:
+        return 0 <= idx < self.n_frames and bool(self.detected[idx])
+
+    def __len__(self) -> int:
+        return self.n_frames
+
+
+def analyze_movement(frames: Iterable[np.ndarray], threshold: float = 50.0, method: str = 'auto',
+                     detector: Optional[CameraMovementDetector] = None, max_gap: int = 2,
+                     min_length: int = 1) -> MovementResults:
+    """
+    Detect camera movement and return structured per-pair results and segments.
+    
+    Args:
+        frames: Sequence or iterable of image frames (as numpy arrays).
+        threshold: Sensitivity threshold for detecting movement.
+        method: Detection method, see detect_significant_movement.
+        detector: Detector instance to reuse.
+        max_gap: Static pairs allowed inside a segment before it is split (hysteresis).
+        min_length: Minimum number of frames in a segment.
+    
+    Returns:
+        MovementResults for the whole sequence.
+    """
+    pairs = []
+    n_frames = 0
+    
+    def counted(source):
+        nonlocal n_frames
+        for frame in source:
+            n_frames += 1
+            yield frame
     
-    return movement_indices
+    for pair in detect_movement_stream(counted(frames), threshold, method, detector=detector):
+        pairs.append(pair)
+    return MovementResults(n_frames, pairs, method, threshold, max_gap, min_length)
@@ -0,0 +1,242 @@
+import os
+import queue
+import threading
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+import movement_detector
+
+# Marks a mask change in a stream's pending queue, applied between its frames
+_SET_MASK = object()
+
+
+class _StreamState:
+    """Long-lived detection state of one camera stream"""
+
+    def __init__(self, detector: movement_detector.CameraMovementDetector, lock: threading.Lock):
+        self.detector = detector
+        self.previous = None    # FrameFeatures of the last processed frame
+        self.reference = None   # FrameFeatures of the reference view
+        self.index = 0
+        self.pending = deque()  # (frame, timestamp) or (_SET_MASK, mask), in order
+        self.scheduled = False
+        self.drained = threading.Condition(lock)  # notified when pending runs empty
+        self.frames_processed = 0
+        self.events = 0
+
+
+class MultiStreamDetector:
+    """
+    Movement detection service for many fixed cameras sharing one worker pool.
+
+    Frames are submitted with a stream ID. Each stream keeps its own
+    CameraMovementDetector, the previous frame's cached features and a
+    reference frame, and its frames are processed strictly in order while
+    different streams run concurrently. A thread pool is used because OpenCV
+    releases the GIL and per-stream state stays in one process. At most
+    max_pending frames are queued across all streams; submit blocks (or drops
+    the frame when block=False) once that limit is reached.
+
+    Every pair where movement is detected produces an event dict that is
+    passed to on_event, or queued for poll_events() when no callback is set.
+    Events also report whether the current view is displaced from the
+    stream's reference frame, which stays set until reset_reference().
+
+    Regions that are always moving (screens, trees, timestamps) can be
+    excluded per stream with set_mask(), or learned from each stream's first
+    frames by passing learn_mask_frames in detector_kwargs.
+    """
+
+    def __init__(self, method: str = 'auto', threshold: float = 50.0, max_workers: Optional[int] = None,
+                 max_pending: int = 64, on_event: Optional[Callable[[Dict], None]] = None,
+                 detector_kwargs: Optional[Dict] = None):
+        self.method = method
+        self.threshold = threshold
+        self.on_event = on_event
+        self.detector_kwargs = detector_kwargs or {}
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._streams = {}
+        self._in_flight = 0
+        self._events = queue.Queue()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def submit(self, stream_id: Hashable, frame: np.ndarray, timestamp: Optional[Any] = None,
+               block: bool = True, timeout: Optional[float] = None) -> bool:
+        """
+        Queue a frame of a stream for detection.
+
+        Returns False if the frame was dropped because the pending limit was
+        reached and block is False or the timeout expired.
+        """
+        if not self._slots.acquire(blocking=block, timeout=timeout if block else None):
+            return False
+
+        with self._lock:
+            state = self._get_state(stream_id)
+            state.pending.append((frame, timestamp))
+            self._in_flight += 1
+            schedule = not state.scheduled
+            state.scheduled = True
+
+        if schedule:
+            self._executor.submit(self._drain, stream_id, state)
+        return True
+
+    def _get_state(self, stream_id: Hashable) -> _StreamState:
+        """State of a stream, created on first use (the lock must be held)"""
+        state = self._streams.get(stream_id)
+        if state is None:
+            state = _StreamState(movement_detector.CameraMovementDetector(**self.detector_kwargs), self._lock)
+            self._streams[stream_id] = state
+        return state
+
+    def _drain(self, stream_id: Hashable, state: _StreamState):
+        """Process the queued frames and mask changes of one stream in order"""
+        while True:
+            with self._lock:
+                if not state.pending:
+                    state.scheduled = False
+                    state.drained.notify_all()
+                    return
+                frame, timestamp = state.pending.popleft()
+
+            set_mask = frame is _SET_MASK
+            try:
+                if set_mask:
+                    self._apply_mask(state, timestamp)
+                else:
+                    self._process(stream_id, state, frame, timestamp)
+            except Exception as e:
+                print(f"Error processing frame {state.index} of stream {stream_id}: {str(e)}")
+            finally:
+                if not set_mask:
+                    state.index += 1
+                    self._slots.release()
+                with self._lock:
+                    self._in_flight -= 1
+                    if self._in_flight == 0:
+                        self._idle.notify_all()
+
+    def _process(self, stream_id: Hashable, state: _StreamState, frame: np.ndarray, timestamp: Optional[Any]):
+        """Compare a frame with the previous one of its stream and emit an event on movement"""
+        detector = state.detector
+        # Holding on to FrameFeatures keeps their features computed across calls
+        features = detector.get_frame_features(frame)
+        previous, state.previous = state.previous, features
+        state.frames_processed += 1
+
+        if state.reference is None:
+            state.reference = features
+        if previous is None or previous.frame.shape != frame.shape:
+            return
+
+        movement_detected, results = movement_detector.detect_pair(
+            detector, previous, features, self.threshold, self.method
+        )
+        if not movement_detected:
+            return
+
+        # A knocked or tampered camera stays displaced from its reference view
+        displaced = detector.detect_with_feature_matching(state.reference, features)['movement_detected']
+        state.events += 1
+        event = {
+            'stream_id': stream_id,
+            'index': state.index,
+            'timestamp': timestamp,
+            'displaced_from_reference': displaced,
+            'results': results
+        }
+        if self.on_event is not None:
+            self.on_event(event)
+        else:
+            self._events.put(event)
+
+    def poll_events(self) -> List[Dict]:
+        """Return the events queued since the last call (when no on_event callback is set)"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def reset_reference(self, stream_id: Hashable):
+        """Use the stream's next frame as its new reference view"""
+        with self._lock:
+            state = self._streams.get(stream_id)
+            if state is not None:
+                state.reference = None
+
+    def set_mask(self, stream_id: Hashable, mask: Optional[np.ndarray]):
+        """
+        Set the static ROI mask of a stream (nonzero = analyzed, native resolution).
+
+        Takes effect from the next frame pair; frames already queued for the
+        stream are processed first. Pass None to analyze the whole frame again.
+        """
+        # Queued like a frame so the stream's worker applies it in order
+        with self._lock:
+            state = self._get_state(stream_id)
+            state.pending.append((_SET_MASK, mask))
+            self._in_flight += 1
+            schedule = not state.scheduled
+            state.scheduled = True
+
+        if schedule:
+            self._executor.submit(self._drain, stream_id, state)
+
+    def _apply_mask(self, state: _StreamState, mask: Optional[np.ndarray]):
+        """Set a stream's mask from its worker, between two frames"""
+        state.detector.set_mask(mask)
+        # Features held by the stream were selected with the old mask
+        for name in ('previous', 'reference'):
+            features = getattr(state, name)
+            if features is not None:
+                setattr(state, name, movement_detector.FrameFeatures(features.frame))
+
+    def remove_stream(self, stream_id: Hashable):
+        """Forget a stream once its queued frames are processed"""
+        with self._lock:
+            state = self._streams.get(stream_id)
+            if state is None:
+                return
+            # Other streams keep running; only this one has to finish
+            state.drained.wait_for(lambda: not state.scheduled)
+            if self._streams.get(stream_id) is state:
+                del self._streams[stream_id]
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until every submitted frame has been processed"""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+
+    def stats(self) -> Dict:
+        """Per-stream frame and event counts plus the number of frames in flight"""
+        with self._lock:
+            return {
+                'in_flight': self._in_flight,
+                'streams': {
+                    stream_id: {
+                        'frames_processed': state.frames_processed,
+                        'events': state.events,
+                        'pending': len(state.pending)
+                    }
+                    for stream_id, state in self._streams.items()
+                }
+            }
+
+    def close(self):
+        """Process the remaining frames and shut down the worker pool"""
+        self.wait()
+        self._executor.shutdown(wait=True)
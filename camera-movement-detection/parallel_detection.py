@@ -0,0 +1,104 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple
+
+import movement_detector
+
+# Detector owned by each worker process, created once by the pool initializer
+_worker_detector = None
+
+
+def _init_worker():
+    """Create the per-process detector"""
+    global _worker_detector
+    movement_detector.init_pool_worker()
+    _worker_detector = movement_detector.CameraMovementDetector()
+
+
+def _detect_chunk(shm_name: str, shape: Tuple[int, ...], dtype: str, start: int, stop: int,
+                  threshold: float, method: str) -> List[int]:
+    """Detect movement for pairs start..stop-1 of frames stored in shared memory"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        
+        # Tracks and counters of the worker's previous chunk do not continue here
+        _worker_detector.reset_state()
+        
+        # Chunks overlap by one frame so the first pair of each chunk is complete
+        movement_indices = [
+            start - 1 + pair['index']
+            for pair in movement_detector.detect_movement_stream(
+                frames[start - 1:stop], threshold, method, detector=_worker_detector
+            )
+            if pair['movement_detected']
+        ]
+        
+        # Release every view into the shared buffer before closing it
+        _worker_detector.clear_cache()
+        del frames
+        return movement_indices
+    finally:
+        shm.close()
+
+
+def detect_significant_movement_parallel(frames: List[np.ndarray], threshold: float = 50.0, method: str = 'auto',
+                                         workers: Optional[int] = None, chunk_size: int = 32) -> List[int]:
+    """
+    Parallel variant of detect_significant_movement using a process pool.
+    
+    Frames are copied once into a shared memory block that workers map
+    without pickling. The sequence is split into chunks of pairs with one
+    frame of overlap, each worker owns its own CameraMovementDetector and
+    the indices are returned in order. The keyframe method compares every
+    frame against a reference carried across the whole sequence, so it runs
+    serially.
+    
+    Args:
+        frames: List of image frames (as numpy arrays) of identical shape.
+        threshold: Sensitivity threshold for detecting movement.
+        method: Detection method ('auto', 'cascade', 'feature_matching', 'keyframe', 'optical_flow',
+            'tracked_flow', 'grid_flow', 'phase_correlation', 'frame_difference'); 'keyframe' runs serially
+        workers: Number of worker processes (defaults to the CPU count).
+        chunk_size: Number of frame pairs processed per task.
+    
+    Returns:
+        List of indices where significant movement is detected.
+    """
+    if len(frames) < 2:
+        return []
+    
+    workers = workers or os.cpu_count() or 1
+    chunk_size = max(1, chunk_size)
+    
+    # Shared memory needs one uniform array; mixed shapes, tiny inputs and the
+    # keyframe reference, which chunks cannot share, run serially
+    if (workers == 1 or len(frames) - 1 <= chunk_size or method == 'keyframe'
+            or len({frame.shape for frame in frames}) > 1):
+        return movement_detector.detect_significant_movement(frames, threshold, method)
+    
+    shape = (len(frames),) + frames[0].shape
+    dtype = np.dtype(frames[0].dtype)
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * dtype.itemsize)
+    try:
+        shared = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        for idx, frame in enumerate(frames):
+            shared[idx] = frame
+        del shared
+        
+        starts = range(1, len(frames), chunk_size)
+        stops = [min(start + chunk_size, len(frames)) for start in starts]
+        n_tasks = len(starts)
+        
+        with ProcessPoolExecutor(max_workers=min(workers, n_tasks), initializer=_init_worker) as executor:
+            chunks = executor.map(
+                _detect_chunk,
+                [shm.name] * n_tasks, [shape] * n_tasks, [dtype.str] * n_tasks,
+                starts, stops, [threshold] * n_tasks, [method] * n_tasks
+            )
+            return [idx for chunk in chunks for idx in chunk]
+    finally:
+        shm.close()
+        shm.unlink()
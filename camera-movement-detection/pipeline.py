@@ -0,0 +1,286 @@
+import queue
+import threading
+import time
+import cv2
+import numpy as np
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+
+import movement_detector
+
+DROP_POLICIES = [None, 'newest', 'oldest']
+
+# Marks the end of the stream on every queue
+_END = object()
+
+
+class _StageMetrics:
+    """Counters of one pipeline stage"""
+
+    def __init__(self, name: str, input_queue: Optional[queue.Queue]):
+        self.name = name
+        self.input_queue = input_queue
+        self.processed = 0
+        self.dropped = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    def snapshot(self, elapsed: float) -> Dict:
+        depth = self.input_queue.qsize() if self.input_queue is not None else 0
+        return {
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'throughput_fps': self.processed / max(elapsed, 1e-9),
+            'utilization': self.busy_seconds / max(elapsed, 1e-9),
+            'queue_depth': depth,
+            'max_queue_depth': max(self.max_queue_depth, depth)
+        }
+
+
+class DetectionPipeline:
+    """
+    Threaded decode -> preprocess -> features -> match/fusion pipeline.
+
+    Each stage runs on its own thread and hands FrameFeatures to the next one
+    through a bounded queue, so decoding, grayscale conversion, feature
+    extraction and matching of different frames overlap (OpenCV releases the
+    GIL). Full queues block the upstream stage; with a drop_policy the decode
+    stage instead drops the newest frame or the oldest queued one, which keeps
+    latency bounded on live sources that cannot be paused.
+
+    Results are yielded in frame order by run(), in the format of
+    detect_movement_stream plus frame timing, and metrics() reports queue
+    depth, throughput and utilization per stage while it runs.
+    """
+
+    def __init__(self, method: str = 'auto', threshold: float = 50.0,
+                 detector: Optional[movement_detector.CameraMovementDetector] = None,
+                 queue_size: int = 8, drop_policy: Optional[str] = None):
+        if method not in movement_detector.DETECTION_METHODS:
+            raise ValueError(f"Unknown method '{method}', expected one of {movement_detector.DETECTION_METHODS}")
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy '{drop_policy}', expected one of {DROP_POLICIES}")
+
+        self.method = method
+        self.threshold = threshold
+        self.detector = detector or movement_detector.CameraMovementDetector()
+        self.queue_size = max(1, queue_size)
+        self.drop_policy = drop_policy
+
+        self._stop_decoding = threading.Event()
+        self._abort = threading.Event()
+        self._stages = []
+        self._start_time = None
+        self._latencies = []
+
+    def run(self, source: Union[str, int, cv2.VideoCapture, Iterable[np.ndarray]]) -> Iterator[Dict]:
+        """
+        Run the pipeline over a source and yield one result per frame pair.
+
+        Args:
+            source: Video path, camera index, opened cv2.VideoCapture (read but
+                not released) or iterable of RGB or grayscale frames.
+
+        Yields:
+            Dicts with 'index', 'movement_detected', 'results', the frame's
+            'timestamp' in seconds (video position, or capture time for
+            iterables) and the 'latency_ms' from decode to decision.
+        """
+        self._stop_decoding.clear()
+        self._abort.clear()
+        self._start_time = time.perf_counter()
+        self._latencies = []
+
+        decoded = queue.Queue(self.queue_size)
+        preprocessed = queue.Queue(self.queue_size)
+        described = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        decode, preprocess, extract, match = self._stages = [
+            _StageMetrics('decode', None),
+            _StageMetrics('preprocess', decoded),
+            _StageMetrics('features', preprocessed),
+            _StageMetrics('match', described)
+        ]
+
+        threads = [
+            threading.Thread(target=self._decode, args=(source, decode, preprocess), daemon=True),
+            threading.Thread(target=self._transform, args=(self._preprocess, preprocess, extract), daemon=True),
+            threading.Thread(target=self._transform, args=(self._extract, extract, match), daemon=True),
+            threading.Thread(target=self._transform, args=(self._match_stage(), match, None, results), daemon=True)
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            while True:
+                item = results.get()
+                if item is _END:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                self._latencies.append(item['latency_ms'])
+                yield item
+        finally:
+            # Unblock every stage when the consumer stops early or a stage failed
+            self._abort.set()
+            for thread in threads:
+                thread.join()
+
+    def stop(self):
+        """Stop decoding; frames already decoded are still processed and yielded"""
+        self._stop_decoding.set()
+
+    def metrics(self) -> Dict:
+        """Per-stage queue depth, throughput and utilization plus end-to-end latency"""
+        elapsed = time.perf_counter() - self._start_time if self._start_time is not None else 0.0
+        latencies = np.array(self._latencies) if self._latencies else np.zeros(1)
+        return {
+            'elapsed_seconds': elapsed,
+            'stages': {stage.name: stage.snapshot(elapsed) for stage in self._stages},
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p90': float(np.percentile(latencies, 90)),
+                'max': float(latencies.max())
+            }
+        }
+
+    def _put(self, output: queue.Queue, item, consumer: Optional[_StageMetrics]) -> bool:
+        """Blocking put that gives up when the pipeline is aborted"""
+        while not self._abort.is_set():
+            try:
+                output.put(item, timeout=0.1)
+            except queue.Full:
+                continue
+            if consumer is not None:
+                consumer.max_queue_depth = max(consumer.max_queue_depth, output.qsize())
+            return True
+        return False
+
+    def _get(self, input_queue: queue.Queue):
+        """Blocking get that returns the end marker when the pipeline is aborted"""
+        while not self._abort.is_set():
+            try:
+                return input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    def _decode(self, source, stage: _StageMetrics, consumer: _StageMetrics):
+        """Decode stage: read frames and apply the drop policy when the pipeline falls behind"""
+        output = consumer.input_queue
+        try:
+            frames = _read_source(source)
+            while not self._stop_decoding.is_set() and not self._abort.is_set():
+                start = time.perf_counter()
+                entry = next(frames, None)
+                if entry is None:
+                    break
+                frame, timestamp, is_bgr = entry
+                decoded_at = time.perf_counter()
+                stage.busy_seconds += decoded_at - start
+                item = {'index': stage.processed, 'frame': frame, 'timestamp': timestamp, 'bgr': is_bgr,
+                        'decoded_at': decoded_at}
+                stage.processed += 1
+
+                if self.drop_policy is None:
+                    self._put(output, item, consumer)
+                    continue
+                try:
+                    output.put_nowait(item)
+                except queue.Full:
+                    if self.drop_policy == 'newest':
+                        stage.dropped += 1
+                        continue
+                    # Make room by discarding the oldest queued frame
+                    try:
+                        output.get_nowait()
+                        stage.dropped += 1
+                    except queue.Empty:
+                        pass
+                    self._put(output, item, consumer)
+                consumer.max_queue_depth = max(consumer.max_queue_depth, output.qsize())
+            frames.close()
+        except Exception as e:
+            self._put(output, e, consumer)
+        self._put(output, _END, consumer)
+
+    def _transform(self, func: Callable[[Dict], Optional[Dict]], stage: _StageMetrics,
+                   consumer: Optional[_StageMetrics], output: Optional[queue.Queue] = None):
+        """Run one stage function on every item, passing errors and the end marker on"""
+        output = output if output is not None else consumer.input_queue
+        while True:
+            item = self._get(stage.input_queue)
+            if item is _END or isinstance(item, BaseException):
+                self._put(output, item, consumer)
+                return
+
+            start = time.perf_counter()
+            try:
+                item = func(item)
+            except Exception as e:
+                item = e
+            stage.busy_seconds += time.perf_counter() - start
+            stage.processed += 1
+            if item is not None:
+                self._put(output, item, consumer)
+
+    def _preprocess(self, item: Dict) -> Dict:
+        """Preprocess stage: grayscale conversion and downscaling into FrameFeatures"""
+        frame = item.pop('frame')
+        if item.pop('bgr'):
+            # Detectors only need grayscale, so skip the BGR to RGB conversion
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        item['features'] = self.detector.precompute_features(frame)
+        return item
+
+    def _extract(self, item: Dict) -> Dict:
+        """Feature stage: per-frame data of the selected method, computed ahead of matching"""
+        self.detector.precompute_features(item['features'], self.method)
+        return item
+
+    def _match_stage(self) -> Callable[[Dict], Optional[Dict]]:
+        """Match stage: pairwise detection and fusion on consecutive FrameFeatures"""
+        previous = None
+
+        def match(item: Dict) -> Optional[Dict]:
+            nonlocal previous
+            features = item['features']
+            features1, previous = previous, features
+            if features1 is None or features1.frame.shape != features.frame.shape:
+                return None
+
+            movement_detected, results = movement_detector.detect_pair(
+                self.detector, features1, features, self.threshold, self.method
+            )
+            return {
+                'index': item['index'],
+                'timestamp': item['timestamp'],
+                'movement_detected': movement_detected,
+                'results': results,
+                'latency_ms': (time.perf_counter() - item['decoded_at']) * 1000.0
+            }
+
+        return match
+
+
+def _read_source(source) -> Iterator:
+    """Yield (frame, timestamp in seconds, is_bgr) from a video path, camera, capture or iterable"""
+    if isinstance(source, (str, int)):
+        cap = cv2.VideoCapture(source)
+        try:
+            yield from _read_capture(cap)
+        finally:
+            cap.release()
+    elif isinstance(source, cv2.VideoCapture):
+        yield from _read_capture(source)
+    else:
+        for frame in source:
+            yield frame, time.time(), False
+
+
+def _read_capture(cap: cv2.VideoCapture) -> Iterator:
+    """Frames of an opened capture with their position in seconds"""
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            return
+        yield frame, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0, True
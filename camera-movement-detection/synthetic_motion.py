@@ -0,0 +1,154 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+# Supported camera motions; 'foreground' keeps the camera still and moves objects
+MOTIONS = ['static', 'pan', 'tilt', 'shake', 'zoom', 'foreground']
+
+# Per-frame camera motion used inside moving segments, well above the
+# detectors' 20px / 5 degree / 10% thresholds
+MOTION_PARAMS = {
+    'pan_speed': 30.0,     # pixels per frame
+    'tilt_speed': 25.0,    # pixels per frame
+    'shake_amplitude': 35.0,
+    'zoom_step': 0.15,     # relative scale change per frame
+    'foreground_objects': 4
+}
+
+
+def make_base_image(width: int, height: int, seed: int = 0) -> np.ndarray:
+    """Procedurally generate a textured RGB scene that ORB and LK can lock on to"""
+    rng = np.random.default_rng(seed)
+
+    # Smooth low-frequency background
+    noise = rng.random((max(1, height // 32), max(1, width // 32), 3)) * 255
+    image = cv2.resize(noise.astype(np.uint8), (width, height), interpolation=cv2.INTER_CUBIC)
+
+    # High-contrast shapes give corners and descriptors
+    n_shapes = max(50, width * height // 4000)
+    for _ in range(n_shapes):
+        color = tuple(int(c) for c in rng.integers(0, 256, 3))
+        x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+        size = int(rng.integers(5, 40))
+        if rng.random() < 0.5:
+            cv2.rectangle(image, (x, y), (x + size, y + size), color, -1)
+        else:
+            cv2.circle(image, (x, y), size // 2, color, -1)
+    return image
+
+
+def _camera_trajectory(motion: str, n_frames: int, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-frame camera pose (tx, ty, rotation in degrees, scale) and per-pair labels"""
+    poses = np.zeros((n_frames, 4))
+    poses[:, 3] = 1.0
+    labels = np.zeros(max(0, n_frames - 1), dtype=bool)
+
+    # The middle third of the sequence moves, the rest is static
+    start, stop = n_frames // 3, 2 * n_frames // 3
+    for idx in range(1, n_frames):
+        poses[idx] = poses[idx - 1]
+        if not start <= idx < stop:
+            continue
+
+        if motion == 'pan':
+            poses[idx, 0] += MOTION_PARAMS['pan_speed']
+        elif motion == 'tilt':
+            poses[idx, 1] += MOTION_PARAMS['tilt_speed']
+        elif motion == 'shake':
+            # Alternate around the rest position so consecutive offsets differ a lot
+            amplitude = MOTION_PARAMS['shake_amplitude'] * rng.uniform(0.8, 1.2)
+            angle = rng.uniform(0, 2 * np.pi)
+            sign = 1 if idx % 2 else -1
+            poses[idx, 0] = sign * amplitude * np.cos(angle)
+            poses[idx, 1] = sign * amplitude * np.sin(angle)
+        elif motion == 'zoom':
+            # Zoom in and out alternately to stay inside the canvas
+            poses[idx, 3] = 1.0 + MOTION_PARAMS['zoom_step'] if idx % 2 else 1.0
+        else:
+            continue
+        labels[idx - 1] = not np.allclose(poses[idx], poses[idx - 1])
+
+    # Returning to rest after a shake or zoom is a camera movement as well
+    if motion in ('shake', 'zoom') and 0 < stop < n_frames:
+        labels[stop - 1] = not np.allclose(poses[stop - 1], np.array([0, 0, 0, 1.0]))
+        poses[stop:] = [0, 0, 0, 1.0]
+    return poses, labels
+
+
+def _pose_homography(pose: np.ndarray, width: int, height: int, canvas_center: Tuple[float, float]) -> np.ndarray:
+    """Homography mapping canvas coordinates into the frame for a camera pose"""
+    tx, ty, rotation, scale = pose
+    to_origin = np.array([[1, 0, -(canvas_center[0] + tx)], [0, 1, -(canvas_center[1] + ty)], [0, 0, 1]])
+    rotate_scale = np.vstack([cv2.getRotationMatrix2D((0, 0), rotation, scale), [0, 0, 1]])
+    to_frame = np.array([[1, 0, width / 2.0], [0, 1, height / 2.0], [0, 0, 1]])
+    return to_frame @ rotate_scale @ to_origin
+
+
+def generate_sequence(motion: str = 'pan', n_frames: int = 60, width: int = 640, height: int = 360,
+                      seed: int = 0, base_image: Optional[np.ndarray] = None) -> Dict:
+    """
+    Render a synthetic RGB sequence with known camera motion.
+
+    Args:
+        motion: One of MOTIONS.
+        n_frames: Number of frames; the middle third contains the motion.
+        width: Frame width in pixels.
+        height: Frame height in pixels.
+        seed: Random seed for the scene, shake and foreground objects.
+        base_image: Optional RGB scene to film instead of a generated one.
+
+    Returns:
+        Dict with 'frames', per-frame 'homographies' (canvas to frame) and
+        per-pair ground truth 'labels' (True where the camera moved).
+    """
+    if motion not in MOTIONS:
+        raise ValueError(f"Unknown motion '{motion}', expected one of {MOTIONS}")
+
+    rng = np.random.default_rng(seed)
+    poses, labels = _camera_trajectory(motion, n_frames, rng)
+
+    # Canvas large enough for the whole trajectory plus rotation and zoom-out slack
+    margin_x = int(np.abs(poses[:, 0]).max() + width * 0.25)
+    margin_y = int(np.abs(poses[:, 1]).max() + height * 0.25)
+    canvas_size = (width + 2 * margin_x, height + 2 * margin_y)
+    if base_image is None:
+        canvas = make_base_image(canvas_size[0], canvas_size[1], seed)
+    else:
+        canvas = cv2.resize(base_image, canvas_size, interpolation=cv2.INTER_LINEAR)
+    canvas_center = (canvas_size[0] / 2.0, canvas_size[1] / 2.0)
+
+    # Foreground objects move independently of the camera
+    n_objects = MOTION_PARAMS['foreground_objects'] if motion == 'foreground' else 0
+    positions = rng.uniform([0, 0], [width, height], size=(n_objects, 2))
+    velocities = rng.uniform(-15, 15, size=(n_objects, 2))
+    sizes = rng.integers(height // 10, height // 5, size=n_objects)
+
+    frames = []
+    homographies = []
+    for idx in range(n_frames):
+        homography = _pose_homography(poses[idx], width, height, canvas_center)
+        frame = cv2.warpPerspective(canvas, homography, (width, height), flags=cv2.INTER_LINEAR)
+
+        for obj in range(n_objects):
+            x, y = (positions[obj] + velocities[obj] * idx) % [width, height]
+            size = int(sizes[obj])
+            cv2.rectangle(frame, (int(x), int(y)), (int(x) + size, int(y) + size), (255, 0, 0), -1)
+
+        frames.append(frame)
+        homographies.append(homography)
+
+    return {
+        'motion': motion,
+        'frames': frames,
+        'homographies': homographies,
+        'labels': labels
+    }
+
+
+def generate_suite(n_frames: int = 60, width: int = 640, height: int = 360,
+                   motions: Optional[List[str]] = None, seed: int = 0) -> List[Dict]:
+    """Generate one sequence per motion type"""
+    return [
+        generate_sequence(motion, n_frames, width, height, seed + idx)
+        for idx, motion in enumerate(motions or MOTIONS)
+    ]
@@ -0,0 +1,230 @@
+import os
+import cv2
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import movement_detector
+
+# Color conversions applied to decoded BGR frames
+_COLOR_CONVERSIONS = {
+    'rgb': cv2.COLOR_BGR2RGB,
+    'gray': cv2.COLOR_BGR2GRAY,
+    'bgr': None
+}
+
+
+def get_video_info(video_path: str) -> Dict:
+    """Read basic stream properties without decoding any frame"""
+    cap = cv2.VideoCapture(video_path)
+    try:
+        return {
+            'frame_count': int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+            'fps': cap.get(cv2.CAP_PROP_FPS),
+            'width': int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            'height': int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        }
+    finally:
+        cap.release()
+
+
+def convert_frame(frame: np.ndarray, color: str = 'rgb', max_width: Optional[int] = None) -> np.ndarray:
+    """
+    Convert a decoded BGR frame to the requested color space and size.
+
+    Args:
+        frame: Frame as returned by cv2.VideoCapture.
+        color: Output color space ('rgb', 'bgr' or 'gray').
+        max_width: Downscale frames wider than this, keeping the aspect ratio.
+
+    Returns:
+        The converted frame (the input itself when nothing changes).
+    """
+    conversion = _COLOR_CONVERSIONS[color]
+    # Grayscale is converted first so the resize filters one plane instead of
+    # three; color frames are downscaled first so the conversion touches fewer pixels
+    if color == 'gray':
+        frame = cv2.cvtColor(frame, conversion)
+
+    height, width = frame.shape[:2]
+    if max_width is not None and width > max_width:
+        new_height = max(1, int(round(height * max_width / width)))
+        frame = cv2.resize(frame, (max_width, new_height), interpolation=cv2.INTER_AREA)
+
+    if conversion is not None and color != 'gray':
+        frame = cv2.cvtColor(frame, conversion)
+    return frame
+
+
+def read_frames(video_path: str, start: int = 0, stop: Optional[int] = None, step: int = 1,
+                color: str = 'rgb', max_width: Optional[int] = None,
+                seek_threshold: int = 100) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Decode every step-th frame of a video in [start, stop).
+
+    Skipped frames are only grabbed, which avoids the color conversion and
+    copy of retrieve(). Steps larger than seek_threshold seek directly to the
+    next kept frame instead, so frames between keyframes are not decoded.
+
+    Args:
+        video_path: Path of the video file.
+        start: First frame number to read.
+        stop: Frame number to stop before (defaults to the end of the video).
+        step: Distance between kept frames.
+        color: Output color space ('rgb', 'bgr' or 'gray').
+        max_width: Downscale frames wider than this, keeping the aspect ratio.
+        seek_threshold: Minimum step for which seeking replaces grabbing.
+
+    Yields:
+        Tuples of (frame number, frame).
+    """
+    if color not in _COLOR_CONVERSIONS:
+        raise ValueError(f"Unsupported color '{color}', expected one of {list(_COLOR_CONVERSIONS)}")
+
+    step = max(1, step)
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if start > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+        frame_number = start
+        use_seek = step > seek_threshold
+        while stop is None or frame_number < stop:
+            if not cap.grab():
+                break
+
+            ret, frame = cap.retrieve()
+            if not ret:
+                break
+            yield frame_number, convert_frame(frame, color, max_width)
+
+            if use_seek:
+                frame_number += step
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
+            else:
+                # Advance to the next kept frame without retrieving the ones in between
+                for _ in range(step - 1):
+                    frame_number += 1
+                    if (stop is not None and frame_number >= stop) or not cap.grab():
+                        return
+                frame_number += 1
+    finally:
+        cap.release()
+
+
+def _read_range(video_path: str, shm_name: str, shape: Tuple[int, ...], dtype: str, first_slot: int,
+                start: int, stop: int, step: int, color: str, max_width: Optional[int],
+                seek_threshold: int) -> int:
+    """Decode one range of frames inside a worker process into its slots of the shared buffer"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frames = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        count = 0
+        for _, frame in read_frames(video_path, start, stop, step, color, max_width, seek_threshold):
+            frames[first_slot + count] = frame
+            count += 1
+        # Release the view into the shared buffer before closing it
+        del frames
+        return count
+    finally:
+        shm.close()
+
+
+def read_frames_parallel(video_path: str, step: int = 1, color: str = 'rgb', max_width: Optional[int] = None,
+                         max_frames: Optional[int] = None, workers: Optional[int] = None,
+                         min_range_frames: int = 300, seek_threshold: int = 100) -> Tuple[List[int], np.ndarray]:
+    """
+    Decode every step-th frame of a video using several processes.
+
+    The file is split into contiguous frame ranges aligned to step. Each
+    worker seeks to the start of its range and writes its frames into known
+    slots of one shared memory block, so decoded frames are never pickled.
+    Videos spanning fewer than two ranges of min_range_frames, or without a
+    reported frame count, are decoded in the calling process.
+
+    Args:
+        video_path: Path of the video file.
+        step: Keep every step-th frame.
+        color: Output color space ('rgb', 'bgr' or 'gray').
+        max_width: Downscale frames wider than this, keeping the aspect ratio.
+        max_frames: Maximum number of frames to keep.
+        workers: Number of worker processes (defaults to the CPU count).
+        min_range_frames: Minimum number of source frames per worker.
+        seek_threshold: Minimum step for which seeking replaces grabbing.
+
+    Returns:
+        The frame numbers and one (n, height, width[, channels]) array of the frames, in order.
+    """
+    if color not in _COLOR_CONVERSIONS:
+        raise ValueError(f"Unsupported color '{color}', expected one of {list(_COLOR_CONVERSIONS)}")
+
+    step = max(1, step)
+    total_frames = get_video_info(video_path)['frame_count']
+    kept_frames = (total_frames + step - 1) // step if total_frames > 0 else 0
+    if max_frames is not None:
+        kept_frames = min(kept_frames, max_frames)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, kept_frames * step // max(1, min_range_frames))
+
+    if workers <= 1:
+        decoded = read_frames(video_path, step=step, color=color, max_width=max_width, seek_threshold=seek_threshold)
+        decoded = list(islice(decoded, max_frames))
+        if not decoded:
+            return [], np.empty((0,), dtype=np.uint8)
+        return [frame_number for frame_number, _ in decoded], np.stack([frame for _, frame in decoded])
+
+    # The first frame gives the size of every slot
+    first = next(read_frames(video_path, stop=1, color=color, max_width=max_width), None)
+    if first is None:
+        return [], np.empty((0,), dtype=np.uint8)
+    shape = (kept_frames,) + first[1].shape
+    dtype = first[1].dtype
+
+    # Range boundaries are multiples of step so sampling matches a serial read
+    per_worker = (kept_frames + workers - 1) // workers
+    first_slots = list(range(0, kept_frames, per_worker))
+    end_slots = [min(slot + per_worker, kept_frames) for slot in first_slots]
+    n_tasks = len(first_slots)
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * dtype.itemsize)
+    try:
+        with ProcessPoolExecutor(max_workers=n_tasks, initializer=movement_detector.init_pool_worker) as executor:
+            counts = list(executor.map(
+                _read_range,
+                [video_path] * n_tasks, [shm.name] * n_tasks, [shape] * n_tasks, [dtype.str] * n_tasks,
+                first_slots, [slot * step for slot in first_slots], [slot * step for slot in end_slots],
+                [step] * n_tasks, [color] * n_tasks, [max_width] * n_tasks, [seek_threshold] * n_tasks
+            ))
+
+        # Ranges end early when the reported frame count is too high; the
+        # frames are copied out once so the shared block can be released
+        shared = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        slots = [slot for first_slot, count in zip(first_slots, counts)
+                 for slot in range(first_slot, first_slot + count)]
+        if len(slots) == kept_frames:
+            frames = shared.copy()
+        else:
+            frames = shared[slots]
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return [slot * step for slot in slots], frames
+
+
+def sample_frames(video_path: str, max_frames: int = 100, color: str = 'rgb', max_width: Optional[int] = None,
+                  workers: Optional[int] = 1) -> List[np.ndarray]:
+    """Uniformly sample at most max_frames frames from a video, with several decoding processes unless workers is 1"""
+    total_frames = get_video_info(video_path)['frame_count']
+    frame_step = max(1, total_frames // max_frames)
+
+    if workers != 1:
+        _, frames = read_frames_parallel(video_path, step=frame_step, color=color, max_width=max_width,
+                                         max_frames=max_frames, workers=workers)
+        return list(frames)
+
+    # Stop decoding once max_frames are kept instead of reading the remainder
+    frames = read_frames(video_path, step=frame_step, color=color, max_width=max_width)
+    return [frame for _, frame in islice(frames, max_frames)]